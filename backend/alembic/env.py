@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.config import settings
 from app.database import Base
-from app.models import Lecture, Chunk, Topic, TopicAppearance  # Import all models
+from app.models import Lecture, Chunk, Topic, TopicAppearance, KeyValue  # Import all models
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,30 @@
+"""Add key-value table for application state
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create kv table (stores e.g. the HNSW tier the index was last built for)
+    op.create_table(
+        'kv',
+        sa.Column('key', sa.String(100), primary_key=True),
+        sa.Column('value', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('kv')
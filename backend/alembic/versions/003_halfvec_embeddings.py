@@ -0,0 +1,43 @@
+"""Store chunk embeddings as halfvec
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # FP16 storage halves the bytes per embedding in the table and the HNSW graph
+    op.execute('DROP INDEX IF EXISTS idx_chunks_embedding_hnsw')
+    op.execute(
+        'ALTER TABLE chunks ALTER COLUMN embedding TYPE halfvec(384) USING embedding::halfvec(384)'
+    )
+
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute(
+        'CREATE INDEX idx_chunks_embedding_hnsw ON chunks USING hnsw (embedding halfvec_cosine_ops) '
+        'WITH (m = 24, ef_construction = 128)'
+    )
+    op.execute('RESET maintenance_work_mem')
+    op.execute('RESET max_parallel_maintenance_workers')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_chunks_embedding_hnsw')
+    op.execute(
+        'ALTER TABLE chunks ALTER COLUMN embedding TYPE vector(384) USING embedding::vector(384)'
+    )
+    op.execute(
+        'CREATE INDEX idx_chunks_embedding_hnsw ON chunks USING hnsw (embedding vector_cosine_ops) '
+        'WITH (m = 24, ef_construction = 128)'
+    )
@@ -0,0 +1,39 @@
+"""Add materialized view for module dashboards
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pre-aggregated per-module figures served by GET /api/dashboard/{module_code}
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_module_dashboard AS
+        SELECT
+            l.module_code,
+            count(DISTINCT l.id) AS total_lectures,
+            count(DISTINCT t.id) AS total_topics,
+            array_agg(DISTINCT l.week_number ORDER BY l.week_number) AS weeks_covered
+        FROM lectures l
+        LEFT JOIN topics t ON t.module_code = l.module_code
+        GROUP BY l.module_code
+    """)
+
+    # Unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        'CREATE UNIQUE INDEX idx_mv_module_dashboard_module_code ON mv_module_dashboard (module_code)'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS mv_module_dashboard')
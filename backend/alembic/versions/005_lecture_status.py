@@ -0,0 +1,28 @@
+"""Add processing status to lectures
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing lectures were processed synchronously, so they are ready
+    op.add_column(
+        'lectures',
+        sa.Column('status', sa.String(20), nullable=False, server_default='ready')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('lectures', 'status')
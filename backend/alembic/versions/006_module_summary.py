@@ -0,0 +1,98 @@
+"""Add trigger-maintained module summary table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per module, kept current by triggers on lectures and topics
+    op.execute("""
+        CREATE TABLE module_summary (
+            module_code VARCHAR(20) PRIMARY KEY,
+            lecture_count INTEGER NOT NULL DEFAULT 0,
+            topic_count INTEGER NOT NULL DEFAULT 0,
+            last_upload TIMESTAMPTZ
+        )
+    """)
+
+    op.execute("""
+        CREATE FUNCTION update_module_summary_lectures() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO module_summary (module_code, lecture_count, last_upload)
+                VALUES (NEW.module_code, 1, NEW.upload_date)
+                ON CONFLICT (module_code) DO UPDATE
+                SET lecture_count = module_summary.lecture_count + 1,
+                    last_upload = greatest(module_summary.last_upload, EXCLUDED.last_upload);
+            ELSE
+                UPDATE module_summary
+                SET lecture_count = lecture_count - 1
+                WHERE module_code = OLD.module_code;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE FUNCTION update_module_summary_topics() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO module_summary (module_code, topic_count)
+                VALUES (NEW.module_code, 1)
+                ON CONFLICT (module_code) DO UPDATE
+                SET topic_count = module_summary.topic_count + 1;
+            ELSE
+                UPDATE module_summary
+                SET topic_count = topic_count - 1
+                WHERE module_code = OLD.module_code;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE TRIGGER trg_module_summary_lectures
+        AFTER INSERT OR DELETE ON lectures
+        FOR EACH ROW EXECUTE FUNCTION update_module_summary_lectures()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_module_summary_topics
+        AFTER INSERT OR DELETE ON topics
+        FOR EACH ROW EXECUTE FUNCTION update_module_summary_topics()
+    """)
+
+    # Backfill from existing data
+    op.execute("""
+        INSERT INTO module_summary (module_code, lecture_count, topic_count, last_upload)
+        SELECT
+            m.module_code,
+            (SELECT count(*) FROM lectures l WHERE l.module_code = m.module_code),
+            (SELECT count(*) FROM topics t WHERE t.module_code = m.module_code),
+            (SELECT max(upload_date) FROM lectures l WHERE l.module_code = m.module_code)
+        FROM (
+            SELECT module_code FROM lectures
+            UNION
+            SELECT module_code FROM topics
+        ) m
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_module_summary_topics ON topics')
+    op.execute('DROP TRIGGER IF EXISTS trg_module_summary_lectures ON lectures')
+    op.execute('DROP FUNCTION IF EXISTS update_module_summary_topics()')
+    op.execute('DROP FUNCTION IF EXISTS update_module_summary_lectures()')
+    op.execute('DROP TABLE IF EXISTS module_summary')
@@ -0,0 +1,29 @@
+"""Replace topic_appearances topic_id index with a covering index
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lets the topic map load appearances with an index-only scan
+    op.execute("""
+        CREATE INDEX idx_topic_appearances_cover
+        ON topic_appearances (topic_id) INCLUDE (lecture_id, frequency, first_slide)
+    """)
+    op.drop_index('idx_topic_appearances_topic_id', table_name='topic_appearances')
+
+
+def downgrade() -> None:
+    op.create_index('idx_topic_appearances_topic_id', 'topic_appearances', ['topic_id'])
+    op.drop_index('idx_topic_appearances_cover', table_name='topic_appearances')
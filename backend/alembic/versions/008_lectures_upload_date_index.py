@@ -0,0 +1,24 @@
+"""Add descending index on lectures.upload_date
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves the dashboard's recent uploads (ORDER BY upload_date DESC LIMIT 5)
+    op.execute('CREATE INDEX idx_lectures_upload_date_desc ON lectures (upload_date DESC)')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_lectures_upload_date_desc', table_name='lectures')
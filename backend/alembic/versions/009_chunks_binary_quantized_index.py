@@ -0,0 +1,30 @@
+"""Add binary-quantized HNSW index on chunk embeddings
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1 bit per dimension (48 bytes per vector) for the Hamming shortlist that
+    # retrieval reranks with the halfvec embedding (RETRIEVAL_BINARY_RERANK)
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute(
+        'CREATE INDEX idx_chunks_embedding_bq_hnsw ON chunks '
+        'USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)'
+    )
+    op.execute('RESET max_parallel_maintenance_workers')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_chunks_embedding_bq_hnsw')
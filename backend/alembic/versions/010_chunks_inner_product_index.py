@@ -0,0 +1,42 @@
+"""Index chunk embeddings for inner product search
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Embeddings are unit length, so inner product ranks exactly like cosine
+    # without the per-row norms; normalize any rows stored before that held
+    op.execute(
+        'UPDATE chunks SET embedding = l2_normalize(embedding) '
+        'WHERE embedding IS NOT NULL'
+    )
+
+    op.execute('DROP INDEX IF EXISTS idx_chunks_embedding_hnsw')
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute(
+        'CREATE INDEX idx_chunks_embedding_hnsw ON chunks USING hnsw (embedding halfvec_ip_ops) '
+        'WITH (m = 24, ef_construction = 128)'
+    )
+    op.execute('RESET maintenance_work_mem')
+    op.execute('RESET max_parallel_maintenance_workers')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS idx_chunks_embedding_hnsw')
+    op.execute(
+        'CREATE INDEX idx_chunks_embedding_hnsw ON chunks USING hnsw (embedding halfvec_cosine_ops) '
+        'WITH (m = 24, ef_construction = 128)'
+    )
@@ -2,88 +2,150 @@
 API routes for dashboard data
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, Integer, String, JSON
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import List
+from pydantic import TypeAdapter
 
 from ...database import get_db
-from ...models import Lecture, Topic, TopicAppearance
 from ...models.schemas import DashboardStats, ModuleDashboard, LectureResponse
 
 router = APIRouter()
 
+# Shared compiled validator for lecture lists
+_LECTURE_LIST_ADAPTER = TypeAdapter(List[LectureResponse])
+
+# All dashboard figures are gathered in a single round-trip
+DASHBOARD_STATS_SQL = text("""
+    WITH l AS (SELECT count(*) AS c FROM lectures),
+         t AS (SELECT count(*) AS c FROM topics),
+         m AS (
+             SELECT coalesce(array_agg(module_code ORDER BY module_code), '{}') AS ms
+             FROM module_summary
+             WHERE lecture_count > 0
+         ),
+         r AS (
+             SELECT coalesce(json_agg(row_to_json(x) ORDER BY x.upload_date DESC), '[]') AS rows
+             FROM (
+                 SELECT id, module_code, week_number, title, filename, upload_date, num_pages, status
+                 FROM lectures
+                 ORDER BY upload_date DESC
+                 LIMIT 5
+             ) x
+         )
+    SELECT l.c AS total_lectures, t.c AS total_topics, m.ms AS modules, r.rows AS recent_uploads
+    FROM l, t, m, r
+""").columns(
+    total_lectures=Integer,
+    total_topics=Integer,
+    modules=ARRAY(String),
+    recent_uploads=JSON
+)
+
+# Module figures come from the mv_module_dashboard materialized view while it
+# agrees with the trigger-maintained module_summary counts; a module the view
+# hasn't caught up with yet (new upload, pending or failed refresh) is
+# aggregated live from its lectures instead
+MODULE_DASHBOARD_SQL = text("""
+    WITH s AS (
+        SELECT module_code, lecture_count, topic_count
+        FROM module_summary
+        WHERE module_code = :module_code AND lecture_count > 0
+    ),
+    mv AS (
+        SELECT m.total_lectures, m.total_topics, m.weeks_covered
+        FROM mv_module_dashboard m
+        JOIN s ON s.module_code = m.module_code
+        WHERE m.total_lectures = s.lecture_count
+          AND m.total_topics = s.topic_count
+    ),
+    live AS (
+        SELECT
+            s.lecture_count AS total_lectures,
+            s.topic_count AS total_topics,
+            (
+                SELECT array_agg(DISTINCT week_number ORDER BY week_number)
+                FROM lectures
+                WHERE module_code = s.module_code
+            ) AS weeks_covered
+        FROM s
+        WHERE NOT EXISTS (SELECT 1 FROM mv)
+    ),
+    d AS (
+        SELECT * FROM mv
+        UNION ALL
+        SELECT * FROM live
+    )
+    SELECT
+        d.total_lectures,
+        d.total_topics,
+        d.weeks_covered,
+        (
+            SELECT coalesce(json_agg(row_to_json(l) ORDER BY l.week_number), '[]')
+            FROM (
+                SELECT id, module_code, week_number, title, filename, upload_date, num_pages, status
+                FROM lectures
+                WHERE module_code = :module_code
+            ) l
+        ) AS lectures
+    FROM d
+""").columns(
+    total_lectures=Integer,
+    total_topics=Integer,
+    weeks_covered=ARRAY(Integer),
+    lectures=JSON
+)
+
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
     """
     Get overall dashboard statistics
     """
-    # Total lectures
-    total_lectures = db.query(Lecture).count()
-
-    # Total topics
-    total_topics = db.query(Topic).count()
-
-    # Unique modules
-    modules = db.query(distinct(Lecture.module_code)).all()
-    modules_list = [module[0] for module in modules]
-
-    # Recent uploads (last 5)
-    recent_lectures = db.query(Lecture).order_by(
-        Lecture.upload_date.desc()
-    ).limit(5).all()
-
-    recent_uploads = [
-        LectureResponse.from_orm(lecture)
-        for lecture in recent_lectures
-    ]
-
-    return DashboardStats(
-        total_lectures=total_lectures,
-        total_topics=total_topics,
-        modules=modules_list,
+    stats = (await db.execute(DASHBOARD_STATS_SQL)).one()
+
+    recent_uploads = _LECTURE_LIST_ADAPTER.validate_python(stats.recent_uploads)
+
+    dashboard_stats = DashboardStats(
+        total_lectures=stats.total_lectures,
+        total_topics=stats.total_topics,
+        modules=stats.modules,
         recent_uploads=recent_uploads
     )
 
+    # Return the serialized model directly so FastAPI doesn't validate it a second time
+    return ORJSONResponse(dashboard_stats.model_dump(mode="json"))
+
 
 @router.get("/{module_code}", response_model=ModuleDashboard)
 async def get_module_dashboard(
     module_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get dashboard data for a specific module
     """
     module_code = module_code.upper()
 
-    # Get lectures
-    lectures = db.query(Lecture).filter(
-        Lecture.module_code == module_code
-    ).order_by(Lecture.week_number).all()
+    dashboard = (await db.execute(
+        MODULE_DASHBOARD_SQL, {"module_code": module_code}
+    )).one_or_none()
 
-    if not lectures:
+    if dashboard is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No lectures found for module {module_code}"
         )
 
-    # Total topics
-    total_topics = db.query(Topic).filter(
-        Topic.module_code == module_code
-    ).count()
-
-    # Weeks covered
-    weeks_covered = sorted(set(lecture.week_number for lecture in lectures))
-
     # Convert lectures to response format
-    lecture_responses = [
-        LectureResponse.from_orm(lecture)
-        for lecture in lectures
-    ]
+    lecture_responses = _LECTURE_LIST_ADAPTER.validate_python(dashboard.lectures)
 
     return ModuleDashboard(
         module_code=module_code,
-        total_lectures=len(lectures),
-        total_topics=total_topics,
-        weeks_covered=weeks_covered,
+        total_lectures=dashboard.total_lectures,
+        total_topics=dashboard.total_topics,
+        weeks_covered=dashboard.weeks_covered,
         lectures=lecture_responses
     )
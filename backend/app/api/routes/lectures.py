@@ -1,11 +1,16 @@
 """
 API routes for lecture management
 """
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.orm import raiseload
 from typing import List, Optional
+from pydantic import TypeAdapter
 import os
 import uuid
+import aiofiles
 from pathlib import Path
 
 from ...database import get_db
@@ -13,23 +18,39 @@ from ...models import Lecture, Chunk
 from ...models.schemas import (
     LectureResponse,
     LectureDetail,
+    LectureStatusResponse,
     UploadResponse
 )
 from ...services.pdf_processor import pdf_processor
-from ...services.embeddings import embedding_service
-from ...utils.chunking import text_chunker
+from ...services.dashboard_view import refresh_module_dashboard
+from ...services.lecture_ingestion import process_lecture
+from ...services.module_index import module_index
 from ...config import settings
 
 router = APIRouter()
 
+# Shared compiled validator for lecture lists
+_LECTURE_LIST_ADAPTER = TypeAdapter(List[LectureResponse])
 
-@router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
+
+def _chunk_count_subquery():
+    """Correlated count of a lecture's chunks, for use as a select column"""
+    return (
+        select(func.count())
+        .select_from(Chunk)
+        .where(Chunk.lecture_id == Lecture.id)
+        .scalar_subquery()
+    )
+
+
+@router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_lecture(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     module_code: str = Form(...),
     week_number: int = Form(...),
     lecture_title: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload a lecture PDF file
@@ -38,6 +59,9 @@ async def upload_lecture(
     - **module_code**: Module code (e.g., COMP3001)
     - **week_number**: Week number (1-24)
     - **lecture_title**: Title of the lecture
+
+    Text extraction and embedding run in the background; poll
+    `/lectures/{lecture_id}/status` until the lecture is ready.
     """
     # Validate file type
     if not file.filename.endswith('.pdf'):
@@ -46,96 +70,65 @@ async def upload_lecture(
             detail="Only PDF files are allowed"
         )
 
-    # Validate file size
+    # Create unique filename
+    file_extension = Path(file.filename).suffix
+    unique_filename = f"{uuid.uuid4()}{file_extension}"
+    file_path = os.path.join(settings.upload_dir, unique_filename)
+
+    # Stream the upload to disk, enforcing the size limit as we go
     file_size = 0
     chunk_size = 1024 * 1024  # 1MB chunks
-    temp_file = []
-
-    # Read file in chunks to check size
-    while True:
-        chunk = await file.read(chunk_size)
-        if not chunk:
-            break
-        file_size += len(chunk)
-        temp_file.append(chunk)
-
-        if file_size > settings.max_file_size_mb * 1024 * 1024:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size exceeds maximum allowed ({settings.max_file_size_mb}MB)"
-            )
-
-    # Reset file pointer
-    await file.seek(0)
+    max_file_size = settings.max_file_size_mb * 1024 * 1024
 
     try:
-        # Create unique filename
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(settings.upload_dir, unique_filename)
-
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(b"".join(temp_file))
-
-        # Validate PDF
-        if not pdf_processor.validate_pdf(file_path):
+        async with aiofiles.open(file_path, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                # Reject non-PDFs on the first chunk instead of writing them out
+                if file_size == 0 and not pdf_processor.has_pdf_header(chunk):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="File is not a PDF"
+                    )
+
+                file_size += len(chunk)
+
+                if file_size > max_file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File size exceeds maximum allowed ({settings.max_file_size_mb}MB)"
+                    )
+
+                await f.write(chunk)
+    except Exception:
+        if os.path.exists(file_path):
             os.remove(file_path)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid or corrupted PDF file"
-            )
+        raise
 
-        # Extract text from PDF
-        slides, num_pages = pdf_processor.extract_text_from_pdf(file_path)
+    # Validate PDF
+    if not pdf_processor.validate_pdf(file_path):
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or corrupted PDF file"
+        )
 
-        # Create lecture record
+    try:
+        # Create lecture record; extraction and embedding happen in the background
         lecture = Lecture(
             module_code=module_code.upper(),
             week_number=week_number,
             title=lecture_title,
             filename=unique_filename,
-            num_pages=num_pages
+            status="processing"
         )
 
         db.add(lecture)
-        db.commit()
-        db.refresh(lecture)
-
-        # Chunk the slides
-        chunks_data = text_chunker.chunk_by_slide(slides)
-
-        # Generate embeddings and create chunk records
-        if chunks_data:
-            # Extract text content for embedding
-            texts = [chunk["content"] for chunk in chunks_data]
-
-            # Generate embeddings in batch
-            print(f"Generating embeddings for {len(texts)} chunks...")
-            embeddings = embedding_service.embed_batch(texts)
-
-            # Create chunk records
-            chunks = []
-            for chunk_data, embedding in zip(chunks_data, embeddings):
-                chunk = Chunk(
-                    lecture_id=lecture.id,
-                    content=chunk_data["content"],
-                    slide_number=chunk_data["slide_number"],
-                    embedding=embedding
-                )
-                chunks.append(chunk)
-
-            db.bulk_save_objects(chunks)
-            db.commit()
-
-            print(f"Created {len(chunks)} chunks for lecture {lecture.id}")
-
-        return UploadResponse(
-            status="success",
-            message=f"Lecture uploaded and processed successfully",
-            lecture=LectureResponse.from_orm(lecture),
-            chunks_created=len(chunks_data) if chunks_data else 0
-        )
+        await db.commit()
+        await db.refresh(lecture)
 
     except Exception as e:
         # Clean up file if upload fails
@@ -143,82 +136,131 @@ async def upload_lecture(
             os.remove(file_path)
 
         # Rollback database changes
-        db.rollback()
+        await db.rollback()
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Upload failed: {str(e)}"
         )
 
+    background_tasks.add_task(process_lecture, lecture.id, file_path)
+
+    return UploadResponse(
+        status="accepted",
+        message="Lecture uploaded; processing has started",
+        lecture=LectureResponse.model_validate(lecture),
+        chunks_created=0
+    )
+
 
 @router.get("", response_model=List[LectureResponse])
 async def get_lectures(
     module_code: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all lectures, optionally filtered by module code
     """
-    query = db.query(Lecture)
+    # Fail loudly on accidental lazy loads (e.g. lecture.chunks) in the list path
+    query = select(Lecture).options(raiseload("*"))
 
     if module_code:
         query = query.filter(Lecture.module_code == module_code.upper())
 
-    lectures = query.order_by(Lecture.week_number).all()
+    lectures = (await db.execute(query.order_by(Lecture.week_number))).scalars().all()
 
-    return [LectureResponse.from_orm(lecture) for lecture in lectures]
+    # Return the serialized list directly so FastAPI doesn't validate it a second time
+    lecture_responses = _LECTURE_LIST_ADAPTER.validate_python(lectures, from_attributes=True)
+    return ORJSONResponse(_LECTURE_LIST_ADAPTER.dump_python(lecture_responses, mode="json"))
 
 
 @router.get("/{lecture_id}", response_model=LectureDetail)
 async def get_lecture(
     lecture_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific lecture by ID
     """
-    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    # Fetch the lecture and its chunk count in one round-trip
+    row = (await db.execute(
+        select(Lecture, _chunk_count_subquery().label("chunks_count"))
+        .filter(Lecture.id == lecture_id)
+    )).one_or_none()
 
-    if not lecture:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lecture not found"
         )
 
-    # Count chunks
-    chunks_count = db.query(Chunk).filter(Chunk.lecture_id == lecture_id).count()
-
-    lecture_data = LectureResponse.from_orm(lecture)
+    lecture_data = LectureResponse.model_validate(row.Lecture)
     return LectureDetail(
-        **lecture_data.dict(),
-        chunks_count=chunks_count
+        **lecture_data.model_dump(),
+        chunks_count=row.chunks_count
+    )
+
+
+@router.get("/{lecture_id}/status", response_model=LectureStatusResponse)
+async def get_lecture_status(
+    lecture_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the processing status of an uploaded lecture
+    """
+    row = (await db.execute(
+        select(
+            Lecture.id,
+            Lecture.status,
+            Lecture.num_pages,
+            _chunk_count_subquery().label("chunks_count")
+        ).filter(Lecture.id == lecture_id)
+    )).one_or_none()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lecture not found"
+        )
+
+    return LectureStatusResponse(
+        id=row.id,
+        status=row.status,
+        num_pages=row.num_pages,
+        chunks_count=row.chunks_count
     )
 
 
 @router.delete("/{lecture_id}")
 async def delete_lecture(
     lecture_id: str,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a lecture and its associated chunks
     """
-    lecture = db.query(Lecture).filter(Lecture.id == lecture_id).first()
+    # Delete from database (chunks and appearances are removed by ON DELETE CASCADE)
+    deleted = (await db.execute(
+        delete(Lecture).where(Lecture.id == lecture_id).returning(Lecture.filename, Lecture.module_code)
+    )).one_or_none()
 
-    if not lecture:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lecture not found"
         )
 
+    await db.commit()
+    module_index.invalidate(deleted.module_code)
+
     # Delete file
-    file_path = os.path.join(settings.upload_dir, lecture.filename)
+    file_path = os.path.join(settings.upload_dir, deleted.filename)
     if os.path.exists(file_path):
         os.remove(file_path)
 
-    # Delete from database (chunks will be cascade deleted)
-    db.delete(lecture)
-    db.commit()
+    background_tasks.add_task(refresh_module_dashboard)
 
     return {
         "status": "success",
@@ -227,11 +269,14 @@ async def delete_lecture(
 
 
 @router.get("/modules/list")
-async def list_modules(db: Session = Depends(get_db)):
+async def list_modules(db: AsyncSession = Depends(get_db)):
     """
     Get list of all unique module codes
     """
-    modules = db.query(Lecture.module_code).distinct().all()
+    # module_summary is maintained by triggers on lectures and topics
+    modules = (await db.execute(
+        text("SELECT module_code FROM module_summary WHERE lecture_count > 0 ORDER BY module_code")
+    )).scalars().all()
     return {
-        "modules": [module[0] for module in modules]
+        "modules": list(modules)
     }
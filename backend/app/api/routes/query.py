@@ -2,7 +2,11 @@
 API routes for RAG-based querying
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+import time
+import orjson
 
 from ...database import get_db
 from ...models.schemas import QueryRequest, QueryResponse
@@ -11,10 +15,15 @@ from ...services.rag_engine import rag_engine
 router = APIRouter()
 
 
+def _sse(event: str, data: dict) -> bytes:
+    """Encode one server-sent event"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
 @router.post("", response_model=QueryResponse)
 async def query_lectures(
     request: QueryRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Ask a question about lecture content using RAG
@@ -31,7 +40,7 @@ async def query_lectures(
     This prevents future content from explaining past concepts.
     """
     try:
-        result = rag_engine.query(
+        result = await rag_engine.query(
             query=request.query,
             module_code=request.module_code,
             db=db,
@@ -49,11 +58,58 @@ async def query_lectures(
         )
 
 
+@router.post("/stream")
+async def query_lectures_stream(
+    request: QueryRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ask a question about lecture content, streaming the answer as server-sent events
+
+    Emits one `sources` event, then `token` events as the LLM produces the
+    answer, then `done` (or `error` if generation fails part-way).
+    """
+    start_time = time.time()
+
+    try:
+        sources, tokens = await rag_engine.query_stream(
+            query=request.query,
+            module_code=request.module_code,
+            db=db,
+            top_k=request.top_k,
+            temporal_filter=request.temporal_filter,
+            current_week=request.current_week
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Query failed: {str(e)}"
+        )
+
+    async def events():
+        yield _sse("sources", {"sources": sources})
+        try:
+            # Provider SDKs stream synchronously; keep them off the event loop
+            async for token in iterate_in_threadpool(tokens):
+                yield _sse("token", {"text": token})
+        except Exception as e:
+            print(f"Error streaming answer: {str(e)}")
+            yield _sse("error", {"detail": "I encountered an error while generating the answer. Please try again."})
+            return
+        yield _sse("done", {"processing_time": time.time() - start_time})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/summary")
 async def generate_topic_summary(
     topic_id: str,
     module_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Generate a comprehensive summary for a specific topic
@@ -64,7 +120,7 @@ async def generate_topic_summary(
     - Important takeaways
     """
     try:
-        summary = rag_engine.generate_topic_summary(
+        summary = await rag_engine.generate_topic_summary(
             topic_id=topic_id,
             module_code=module_code,
             db=db
@@ -1,9 +1,13 @@
 """
 API routes for topic detection and management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import selectinload, raiseload
 from typing import List
+from pydantic import TypeAdapter
 import time
 
 from ...database import get_db
@@ -18,14 +22,19 @@ from ...models.schemas import (
     TopicEdge
 )
 from ...services.topic_detector import topic_detector
+from ...services.dashboard_view import refresh_module_dashboard
 
 router = APIRouter()
 
+# Shared compiled serializer for topic lists
+_TOPIC_LIST_ADAPTER = TypeAdapter(List[TopicResponse])
+
 
 @router.post("/detect", response_model=TopicDetectionResponse)
 async def detect_topics(
     request: TopicDetectionRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Run topic detection on a module
@@ -40,9 +49,11 @@ async def detect_topics(
     start_time = time.time()
 
     # Check if module has lectures
-    lecture_count = db.query(Lecture).filter(
-        Lecture.module_code == request.module_code.upper()
-    ).count()
+    lecture_count = (await db.execute(
+        select(func.count()).select_from(Lecture).filter(
+            Lecture.module_code == request.module_code.upper()
+        )
+    )).scalar()
 
     if lecture_count == 0:
         raise HTTPException(
@@ -52,19 +63,21 @@ async def detect_topics(
 
     try:
         # Delete existing topics for this module
-        db.query(Topic).filter(
-            Topic.module_code == request.module_code.upper()
-        ).delete()
-        db.commit()
+        await db.execute(
+            delete(Topic).filter(Topic.module_code == request.module_code.upper())
+        )
+        await db.commit()
 
         # Run topic detection
-        topics = topic_detector.detect_topics(
+        topics = await topic_detector.detect_topics(
             module_code=request.module_code,
             db=db
         )
 
         processing_time = time.time() - start_time
 
+        background_tasks.add_task(refresh_module_dashboard)
+
         # Format response
         topic_responses = []
         for topic_data in topics:
@@ -104,7 +117,7 @@ async def detect_topics(
             detail=str(e)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Topic detection failed: {str(e)}"
@@ -114,14 +127,19 @@ async def detect_topics(
 @router.get("/{module_code}", response_model=List[TopicResponse])
 async def get_topics(
     module_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all detected topics for a module
     """
-    topics = db.query(Topic).filter(
-        Topic.module_code == module_code.upper()
-    ).all()
+    # Appearances and their lectures are batch-loaded (one query per relationship);
+    # any other lazy load raises instead of silently issuing per-row queries
+    topics = (await db.execute(
+        select(Topic).options(
+            selectinload(Topic.appearances).joinedload(TopicAppearance.lecture),
+            raiseload("*")
+        ).filter(Topic.module_code == module_code.upper())
+    )).scalars().unique().all()
 
     if not topics:
         return []
@@ -129,28 +147,15 @@ async def get_topics(
     # Build response with appearances
     topic_responses = []
     for topic in topics:
-        # Get appearances with lecture info
-        appearances_query = db.query(
-            TopicAppearance,
-            Lecture.week_number,
-            Lecture.title
-        ).join(
-            Lecture, TopicAppearance.lecture_id == Lecture.id
-        ).filter(
-            TopicAppearance.topic_id == topic.id
-        ).order_by(
-            Lecture.week_number
-        ).all()
-
         appearances = [
             TopicAppearanceResponse(
-                lecture_id=str(app[0].lecture_id),
-                week_number=app[1],
-                lecture_title=app[2],
-                frequency=app[0].frequency,
-                first_slide=app[0].first_slide
+                lecture_id=str(app.lecture_id),
+                week_number=app.lecture.week_number,
+                lecture_title=app.lecture.title,
+                frequency=app.frequency,
+                first_slide=app.first_slide
             )
-            for app in appearances_query
+            for app in sorted(topic.appearances, key=lambda app: app.lecture.week_number)
         ]
 
         topic_responses.append(
@@ -164,22 +169,26 @@ async def get_topics(
             )
         )
 
-    return topic_responses
+    # Return the serialized list directly so FastAPI doesn't validate it a second time
+    return ORJSONResponse(_TOPIC_LIST_ADAPTER.dump_python(topic_responses, mode="json"))
 
 
 @router.get("/{module_code}/map", response_model=TopicMapResponse)
 async def get_topic_map(
     module_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get topic map data for visualization
 
     Returns nodes (topics) and edges (relationships) suitable for graph visualization
     """
-    topics = db.query(Topic).filter(
-        Topic.module_code == module_code.upper()
-    ).all()
+    topics = (await db.execute(
+        select(Topic).options(
+            selectinload(Topic.appearances).joinedload(TopicAppearance.lecture),
+            raiseload("*")
+        ).filter(Topic.module_code == module_code.upper())
+    )).scalars().unique().all()
 
     if not topics:
         return TopicMapResponse(nodes=[], edges=[])
@@ -189,30 +198,15 @@ async def get_topic_map(
     topics_list = []
 
     for topic in topics:
-        # Count total appearances
-        appearance_count = db.query(TopicAppearance).filter(
-            TopicAppearance.topic_id == topic.id
-        ).count()
-
-        # Get all appearances for prerequisite inference
-        appearances_query = db.query(
-            TopicAppearance,
-            Lecture.week_number,
-            Lecture.title
-        ).join(
-            Lecture, TopicAppearance.lecture_id == Lecture.id
-        ).filter(
-            TopicAppearance.topic_id == topic.id
-        ).all()
-
+        # Appearances for prerequisite inference
         appearances = [
             {
-                "lecture_id": str(app[0].lecture_id),
-                "week_number": app[1],
-                "lecture_title": app[2],
-                "frequency": app[0].frequency
+                "lecture_id": str(app.lecture_id),
+                "week_number": app.lecture.week_number,
+                "lecture_title": app.lecture.title,
+                "frequency": app.frequency
             }
-            for app in appearances_query
+            for app in topic.appearances
         ]
 
         topics_list.append({
@@ -225,7 +219,9 @@ async def get_topic_map(
             TopicNode(
                 id=str(topic.id),
                 label=topic.name,
-                size=appearance_count * 2,  # Scale node size by appearances
+                # Appearances are loaded for prerequisite inference anyway, so
+                # counting them here saves a separate GROUP BY query
+                size=len(appearances) * 2,  # Scale node size by appearances
                 color="#646cff"
             )
         )
@@ -248,21 +244,26 @@ async def get_topic_map(
 @router.delete("/{topic_id}")
 async def delete_topic(
     topic_id: str,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a topic
     """
-    topic = db.query(Topic).filter(Topic.id == topic_id).first()
+    # Appearances are removed by the database's ON DELETE CASCADE
+    deleted = (await db.execute(
+        delete(Topic).where(Topic.id == topic_id).returning(Topic.id)
+    )).scalar_one_or_none()
 
-    if not topic:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Topic not found"
         )
 
-    db.delete(topic)
-    db.commit()
+    await db.commit()
+
+    background_tasks.add_task(refresh_module_dashboard)
 
     return {
         "status": "success",
@@ -1,7 +1,9 @@
 """
 Configuration management using Pydantic Settings
 """
-from typing import List
+import os
+from functools import cached_property
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -21,22 +23,59 @@ class Settings(BaseSettings):
     ollama_model: str = Field(default="llama2", alias="OLLAMA_MODEL")
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
     anthropic_api_key: str = Field(default="", alias="ANTHROPIC_API_KEY")
+    # Context window of the LLM; retrieved chunks that don't fit alongside the
+    # question and the answer are dropped, lowest similarity first
+    llm_context_tokens: int = Field(default=4096, alias="LLM_CONTEXT_TOKENS")
 
     # Embeddings
     embedding_provider: str = Field(default="local", alias="EMBEDDING_PROVIDER")
     embedding_model: str = Field(default="all-MiniLM-L6-v2", alias="EMBEDDING_MODEL")
     embedding_dimension: int = Field(default=384, alias="EMBEDDING_DIMENSION")
+    # model2vec model for EMBEDDING_PROVIDER=static; when unset EMBEDDING_MODEL
+    # is distilled into one of the same dimension
+    static_embedding_model: str = Field(default="", alias="STATIC_EMBEDDING_MODEL")
+    # Run the local model as a dynamically quantized int8 ONNX export
+    embedding_quantize: bool = Field(default=False, alias="EMBEDDING_QUANTIZE")
+    embedding_quantize_config: str = Field(default="avx512_vnni", alias="EMBEDDING_QUANTIZE_CONFIG")
+    embedding_model_dir: str = Field(default="./models", alias="EMBEDDING_MODEL_DIR")
+    # Defaults to the CPU count split across server workers
+    embedding_num_threads: Optional[int] = Field(default=None, alias="EMBEDDING_NUM_THREADS")
+    # Texts per local model forward pass; batches are length-sorted, so larger
+    # batches mainly cost memory
+    embedding_batch_size: int = Field(default=64, alias="EMBEDDING_BATCH_SIZE")
+    # Run the local model in FP16 on CUDA / BF16 autocast on CPU (needs AVX-512 BF16 or AMX)
+    embedding_half_precision: bool = Field(default=False, alias="EMBEDDING_HALF_PRECISION")
+    # Per-worker LRU cache of query embeddings (0 disables)
+    embedding_cache_size: int = Field(default=4096, alias="EMBEDDING_CACHE_SIZE")
+
+    @cached_property
+    def embedding_threads(self) -> int:
+        """Intra-op threads for local embedding inference in each worker"""
+        if self.embedding_num_threads:
+            return self.embedding_num_threads
+        return max(1, (os.cpu_count() or 1) // max(1, self.workers))
 
     # File Upload
     upload_dir: str = Field(default="./uploads", alias="UPLOAD_DIR")
     max_file_size_mb: int = Field(default=50, alias="MAX_FILE_SIZE_MB")
     allowed_extensions: str = Field(default=".pdf", alias="ALLOWED_EXTENSIONS")
+    # Page extraction processes per server worker; defaults to the CPU count
+    # split across server workers
+    pdf_num_workers: Optional[int] = Field(default=None, alias="PDF_NUM_WORKERS")
+
+    @cached_property
+    def pdf_workers(self) -> int:
+        """Page extraction processes in each server worker's pool"""
+        if self.pdf_num_workers:
+            return self.pdf_num_workers
+        return max(1, (os.cpu_count() or 1) // max(1, self.workers))
 
     # Server
     host: str = Field(default="0.0.0.0", alias="HOST")
     port: int = Field(default=8000, alias="PORT")
     debug: bool = Field(default=True, alias="DEBUG")
     reload: bool = Field(default=True, alias="RELOAD")
+    workers: int = Field(default=1, alias="WORKERS")  # Server worker processes sharing the CPU
 
     # CORS
     cors_origins: str = Field(
@@ -44,9 +83,9 @@ class Settings(BaseSettings):
         alias="CORS_ORIGINS"
     )
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins into a list"""
+        """Parse CORS origins into a list (computed once; settings are frozen)"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
     # Topic Detection
@@ -56,12 +95,29 @@ class Settings(BaseSettings):
 
     # RAG Settings
     retrieval_top_k: int = Field(default=5, alias="RETRIEVAL_TOP_K")
-    chunk_size: int = Field(default=500, alias="CHUNK_SIZE")
-    chunk_overlap: int = Field(default=50, alias="CHUNK_OVERLAP")
+    # In embedding-model tokens; keep 1.5x CHUNK_SIZE under the model's input limit
+    chunk_size: int = Field(default=128, alias="CHUNK_SIZE")
+    chunk_overlap: int = Field(default=16, alias="CHUNK_OVERLAP")
+    hnsw_auto_tune: bool = Field(default=True, alias="HNSW_AUTO_TUNE")
+    # Per-query override; when unset the auto-tuned tier's search width applies
+    hnsw_ef_search: Optional[int] = Field(default=None, alias="HNSW_EF_SEARCH")
+    # Keep scanning the HNSW graph until filtered queries fill top_k (pgvector 0.8+):
+    # off | relaxed_order | strict_order
+    hnsw_iterative_scan: str = Field(default="relaxed_order", alias="HNSW_ITERATIVE_SCAN")
+    # Shortlist rerank_factor * top_k chunks by Hamming distance over binary-quantized
+    # embeddings, then rerank them by halfvec cosine distance
+    retrieval_binary_rerank: bool = Field(default=False, alias="RETRIEVAL_BINARY_RERANK")
+    retrieval_rerank_factor: int = Field(default=4, alias="RETRIEVAL_RERANK_FACTOR")
+    # Search modules of up to this many chunks in process memory instead of
+    # pgvector (0, the default, disables it); at most max_modules are held at
+    # once, each costing ~1.5KB per chunk per worker. Ignored with binary rerank
+    module_index_max_chunks: int = Field(default=0, alias="MODULE_INDEX_MAX_CHUNKS")
+    module_index_max_modules: int = Field(default=8, alias="MODULE_INDEX_MAX_MODULES")
 
     class Config:
         env_file = ".env"
         case_sensitive = False
+        frozen = True
 
 
 # Singleton instance
@@ -1,38 +1,75 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from pgvector import HalfVector
 from .config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
+# Create async SQLAlchemy engine (asyncpg driver)
+engine = create_async_engine(
+    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+    pool_size=20,
+    max_overflow=20,
     pool_pre_ping=True,  # Verify connections before using
     echo=settings.debug   # Log SQL queries in debug mode
 )
 
+
+
+def _encode_halfvec(value) -> bytes:
+    """Encode a halfvec parameter; SQLAlchemy binds it as text, COPY passes lists"""
+    if isinstance(value, str):
+        value = HalfVector.from_text(value)
+    elif not isinstance(value, HalfVector):
+        value = HalfVector(value)
+    return value.to_binary()
+
+
+async def _register_halfvec_codec(conn):
+    """Use pgvector's binary halfvec format (required by COPY)"""
+    try:
+        await conn.set_type_codec(
+            "halfvec",
+            schema="public",
+            encoder=_encode_halfvec,
+            decoder=HalfVector.from_binary,
+            format="binary"
+        )
+    except ValueError as e:
+        # The vector extension is created by the first migration
+        print(f"halfvec codec not registered: {str(e)}")
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    dbapi_connection.run_async(_register_halfvec_codec)
+
+
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     Dependency function to get database session
     Usage in FastAPI routes:
-        def route(db: Session = Depends(get_db)):
+        async def route(db: AsyncSession = Depends(get_db)):
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+async def init_db():
     """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
@@ -2,18 +2,26 @@
 Smart Lecture Assistant - FastAPI Main Application
 """
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .database import init_db
+from .database import init_db, SessionLocal, engine
+from .services.vector_index import tune_hnsw_index, rebuild_hnsw_index, load_hnsw_tier
+import asyncio
 import os
 
+# Pin OpenMP/MKL thread pools before torch is loaded by the embedding service
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(settings.embedding_threads))
+
 # Create FastAPI application
 app = FastAPI(
     title="Smart Lecture Assistant API",
     description="AI-powered lecture analysis with cross-lecture topic detection and RAG-based Q&A",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -33,7 +41,30 @@ async def startup_event():
     os.makedirs(settings.upload_dir, exist_ok=True)
 
     # Initialize database tables
-    init_db()
+    await init_db()
+
+    # Match HNSW graph density and search width to the dataset size
+    if settings.hnsw_auto_tune:
+        async with SessionLocal() as db:
+            try:
+                params = await tune_hnsw_index(db)
+                print(f"🧭 HNSW params: {params}")
+
+                # Rebuilding can take minutes; run it without holding up startup
+                if params["rebuild"]:
+                    app.state.hnsw_rebuild = asyncio.create_task(
+                        rebuild_hnsw_index(engine, params["m"], params["ef_construction"])
+                    )
+            except Exception as e:
+                await db.rollback()
+                print(f"HNSW auto-tuning skipped: {str(e)}")
+    else:
+        # Keep the search width chosen by the last tuning run
+        async with SessionLocal() as db:
+            try:
+                await load_hnsw_tier(db)
+            except Exception as e:
+                print(f"Recorded HNSW tier not loaded: {str(e)}")
 
     print(f"🚀 Smart Lecture Assistant API started")
     print(f"📚 Upload directory: {settings.upload_dir}")
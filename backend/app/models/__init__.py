@@ -3,5 +3,6 @@ Database models
 """
 from .lecture import Lecture, Chunk
 from .topic import Topic, TopicAppearance
+from .kv import KeyValue
 
-__all__ = ["Lecture", "Chunk", "Topic", "TopicAppearance"]
+__all__ = ["Lecture", "Chunk", "Topic", "TopicAppearance", "KeyValue"]
@@ -0,0 +1,19 @@
+"""
+Database model for small key-value application state
+"""
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class KeyValue(Base):
+    """KeyValue model - stores internal settings such as the current HNSW tier"""
+    __tablename__ = "kv"
+
+    key = Column(String(100), primary_key=True)
+    value = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<KeyValue {self.key}={self.value}>"
@@ -5,8 +5,8 @@ from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
-import uuid
+from pgvector.sqlalchemy import HALFVEC
+from uuid6 import uuid7
 
 from ..database import Base
 
@@ -15,17 +15,19 @@ class Lecture(Base):
     """Lecture model - represents a single lecture PDF"""
     __tablename__ = "lectures"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     module_code = Column(String(20), nullable=False, index=True)
     week_number = Column(Integer, nullable=False)
     title = Column(String(255), nullable=False)
     filename = Column(String(255), nullable=False)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     num_pages = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, default="processing", server_default="ready")  # processing | ready | failed
 
     # Relationships
-    chunks = relationship("Chunk", back_populates="lecture", cascade="all, delete-orphan")
-    topic_appearances = relationship("TopicAppearance", back_populates="lecture", cascade="all, delete-orphan")
+    # Children are removed by the database's ON DELETE CASCADE
+    chunks = relationship("Chunk", back_populates="lecture", passive_deletes=True)
+    topic_appearances = relationship("TopicAppearance", back_populates="lecture", passive_deletes=True)
 
     def __repr__(self):
         return f"<Lecture {self.module_code} Week {self.week_number}: {self.title}>"
@@ -35,14 +37,14 @@ class Chunk(Base):
     """Chunk model - represents a text chunk from a lecture with embedding"""
     __tablename__ = "chunks"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     lecture_id = Column(UUID(as_uuid=True), ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
     slide_number = Column(Integer, nullable=False)
 
-    # Vector embedding (384 dimensions for all-MiniLM-L6-v2)
+    # Vector embedding (384 dimensions for all-MiniLM-L6-v2), stored as FP16
     # This will be configurable based on the embedding model used
-    embedding = Column(Vector(384), nullable=True)
+    embedding = Column(HALFVEC(384), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,7 +1,8 @@
 """
 Pydantic schemas for API request/response validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.dataclasses import dataclass
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
@@ -24,15 +25,22 @@ class LectureResponse(LectureBase):
     filename: str
     upload_date: datetime
     num_pages: Optional[int] = None
+    status: str = "ready"
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class LectureDetail(LectureResponse):
     chunks_count: int = 0
 
 
+class LectureStatusResponse(BaseModel):
+    id: UUID
+    status: str
+    num_pages: Optional[int] = None
+    chunks_count: int = 0
+
+
 # Chunk Schemas
 class ChunkBase(BaseModel):
     content: str
@@ -48,8 +56,7 @@ class ChunkResponse(ChunkBase):
     lecture_id: UUID
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Topic Schemas
@@ -63,24 +70,22 @@ class TopicCreate(TopicBase):
     pass
 
 
-class TopicAppearanceResponse(BaseModel):
+# Per-row response items are slotted dataclasses: no per-instance __dict__
+@dataclass(slots=True, frozen=True, config=ConfigDict(from_attributes=True))
+class TopicAppearanceResponse:
     lecture_id: UUID
     week_number: int
     lecture_title: str
     frequency: int
     first_slide: Optional[int] = None
 
-    class Config:
-        from_attributes = True
-
 
 class TopicResponse(TopicBase):
     id: UUID
     created_at: datetime
     appearances: List[TopicAppearanceResponse] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Query Schemas
@@ -92,7 +97,8 @@ class QueryRequest(BaseModel):
     current_week: Optional[int] = Field(default=None, ge=1, le=24)
 
 
-class SourceResponse(BaseModel):
+@dataclass(slots=True, frozen=True)
+class SourceResponse:
     lecture_title: str
     week_number: int
     slide_number: int
@@ -0,0 +1,22 @@
+"""
+Dashboard View Maintenance
+Keeps the mv_module_dashboard materialized view in sync with lectures and topics
+"""
+from sqlalchemy import text
+
+from ..database import SessionLocal
+
+
+async def refresh_module_dashboard():
+    """
+    Refresh mv_module_dashboard without blocking readers
+
+    Meant to run as a FastAPI background task after lectures or topics change.
+    """
+    async with SessionLocal() as db:
+        try:
+            await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_module_dashboard"))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"Error refreshing module dashboard view: {str(e)}")
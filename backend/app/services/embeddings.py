@@ -1,13 +1,27 @@
 """
 Embedding Service
-Supports local (sentence-transformers) and OpenAI embeddings
+Supports local (sentence-transformers), static (model2vec) and OpenAI embeddings
 """
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from functools import lru_cache
+import asyncio
+import os
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+try:
+    from model2vec import StaticModel
+    MODEL2VEC_AVAILABLE = True
+except ImportError:
+    MODEL2VEC_AVAILABLE = False
 
 from ..config import settings
+from ..utils.vector_math import cosine, cosine_rows
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 class EmbeddingService:
@@ -18,8 +32,15 @@ class EmbeddingService:
         self.model_name = model or settings.embedding_model
         self.dimension = settings.embedding_dimension
 
+        # Recent query embeddings, most recently used last
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_size = settings.embedding_cache_size
+        self._cache_lock = threading.Lock()
+
         if self.provider == "local":
             self._init_local_model()
+        elif self.provider == "static":
+            self._init_static_model()
         elif self.provider == "openai":
             self._init_openai_client()
         else:
@@ -27,14 +48,145 @@ class EmbeddingService:
 
     def _init_local_model(self):
         """Initialize local sentence-transformers model"""
+        # Imported here so importing this module doesn't load torch
+        from sentence_transformers import SentenceTransformer
+
         print(f"Loading local embedding model: {self.model_name}")
-        self.model = SentenceTransformer(self.model_name)
+        self._configure_torch_threads()
+        if settings.embedding_quantize:
+            self.model = self._load_quantized_model()
+        else:
+            self.model = SentenceTransformer(self.model_name)
+        self.model.eval()
+        self._configure_padding()
+
+        # Reduced-precision inference; not applied on top of int8 quantization
+        self.autocast_dtype = None
+        if settings.embedding_half_precision and not settings.embedding_quantize:
+            self._enable_half_precision()
         # Update dimension based on actual model
         self.dimension = self.model.get_sentence_embedding_dimension()
 
+    def _configure_padding(self):
+        """
+        Pad each batch to a multiple of 8 tokens
+
+        Multiple-of-8 sequence lengths give the attention and feed-forward
+        GEMMs regular shapes. Set through the tokenizer module's processing
+        kwargs, which sentence-transformers 6 and later apply on every call.
+        """
+        # Never pad past the position embeddings
+        if self.model.max_seq_length % 8 != 0:
+            return
+
+        processing_kwargs = getattr(self.model[0], "processing_kwargs", None)
+        if processing_kwargs is None:
+            print("Installed sentence-transformers can't pad to a multiple of 8 tokens")
+            return
+        processing_kwargs.setdefault("text", {})["pad_to_multiple_of"] = 8
+
+    def _configure_torch_threads(self):
+        """Size torch's thread pools for inference-only use in this worker"""
+        import torch
+
+        torch.set_grad_enabled(False)
+        torch.set_num_threads(settings.embedding_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set before torch starts parallel work
+            pass
+        print(f"Torch using {settings.embedding_threads} threads")
+
+    def _enable_half_precision(self):
+        """Cast the model to FP16 on CUDA, or autocast the forward to BF16 on CPU"""
+        import torch
+
+        self.device_type = self.model.device.type
+        if self.device_type == "cuda":
+            self.model = self.model.half()
+        else:
+            self.autocast_dtype = torch.bfloat16
+        print(f"Local embedding model using half precision on {self.device_type}")
+
+    def _load_quantized_model(self) -> "SentenceTransformer":
+        """
+        Load a dynamically quantized int8 ONNX export of the local model
+
+        The export is created under EMBEDDING_MODEL_DIR on first use. Falls back
+        to PyTorch dynamic quantization of the Linear layers if the ONNX
+        backend is unavailable.
+        """
+        quantize_config = settings.embedding_quantize_config
+        model_dir = os.path.join(settings.embedding_model_dir, self.model_name.replace("/", "_"))
+        quantized_file = f"onnx/model_qint8_{quantize_config}.onnx"
+
+        from sentence_transformers import SentenceTransformer
+
+        try:
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+
+            if not os.path.exists(os.path.join(model_dir, quantized_file)):
+                print(f"Exporting int8 ONNX model ({quantize_config}) to {model_dir}")
+                model = SentenceTransformer(self.model_name, backend="onnx")
+                model.save(model_dir)
+                export_dynamic_quantized_onnx_model(model, quantize_config, model_dir)
+
+            return SentenceTransformer(
+                model_dir,
+                backend="onnx",
+                model_kwargs={"file_name": quantized_file}
+            )
+
+        except Exception as e:
+            print(f"ONNX quantization unavailable ({str(e)}), using torch dynamic quantization")
+            import torch
+
+            model = SentenceTransformer(self.model_name, device="cpu")
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def _init_static_model(self):
+        """
+        Initialize model2vec static embedding model (token lookup + mean pool)
+
+        Loads STATIC_EMBEDDING_MODEL if set; otherwise EMBEDDING_MODEL is
+        distilled into a static model without PCA, so it keeps the dimension
+        of the chunks column. The distilled model is saved under
+        EMBEDDING_MODEL_DIR on first use.
+        """
+        if not MODEL2VEC_AVAILABLE:
+            raise ValueError("EMBEDDING_PROVIDER=static requires the model2vec package")
+
+        if settings.static_embedding_model:
+            self.model_name = settings.static_embedding_model
+            print(f"Loading static embedding model: {self.model_name}")
+            self.model = StaticModel.from_pretrained(self.model_name)
+        else:
+            model_dir = os.path.join(
+                settings.embedding_model_dir, f"static_{self.model_name.replace('/', '_')}"
+            )
+            if not os.path.isdir(model_dir):
+                from model2vec.distill import distill
+
+                print(f"Distilling static embedding model from {self.model_name} to {model_dir}")
+                distill(model_name=self.model_name, pca_dims=None).save_pretrained(model_dir)
+
+            print(f"Loading static embedding model: {model_dir}")
+            self.model = StaticModel.from_pretrained(model_dir)
+
+        self.dimension = self.model.dim
+
+        # Chunks would otherwise fail to insert into the fixed-size halfvec column
+        if self.dimension != settings.embedding_dimension:
+            raise ValueError(
+                f"Static model {self.model_name} produces {self.dimension}-d embeddings but "
+                f"EMBEDDING_DIMENSION is {settings.embedding_dimension}"
+            )
+
     def _init_openai_client(self):
         """Initialize OpenAI client"""
         self.client = OpenAI(api_key=settings.openai_api_key)
+        self.aclient = AsyncOpenAI(api_key=settings.openai_api_key)
         # OpenAI text-embedding-3-small is 1536 dimensions
         # text-embedding-3-large is 3072 dimensions
         if "large" in self.model_name:
@@ -42,7 +194,7 @@ class EmbeddingService:
         else:
             self.dimension = 1536
 
-    def embed_text(self, text: str) -> List[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text
 
@@ -50,40 +202,102 @@ class EmbeddingService:
             text: Text to embed
 
         Returns:
-            List of floats representing the embedding vector
+            1-D float32 array representing the embedding vector (read-only;
+            the same array is returned for repeated queries)
         """
+        text = text.strip()
+        # The default local model's tokenizer is uncased, so queries differing
+        # only in case embed identically and can share an entry
+        key = text.lower()
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                return embedding
+
         if self.provider == "local":
-            return self._embed_local([text])[0]
+            embedding = self._embed_local([text])[0]
+        elif self.provider == "static":
+            embedding = self._embed_static([text])[0]
         elif self.provider == "openai":
-            return self._embed_openai([text])[0]
+            embedding = self._embed_openai([text])[0]
 
-    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        if self._cache_size > 0:
+            embedding.setflags(write=False)
+            with self._cache_lock:
+                self._cache[key] = embedding
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        return embedding
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         """
         Generate embeddings for multiple texts in batches
 
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process at once
+            batch_size: Number of texts to process at once; defaults to
+                EMBEDDING_BATCH_SIZE for the local model and to each other
+                provider's own batch size
 
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), dimension), L2-normalized
         """
         if self.provider == "local":
-            return self._embed_local(texts, batch_size)
+            return self._embed_local(texts, batch_size or settings.embedding_batch_size)
+        elif self.provider == "static":
+            return self._embed_static(texts, batch_size or 1024)
         elif self.provider == "openai":
-            return self._embed_openai(texts, batch_size)
+            return self._embed_openai(texts, batch_size or 100)
+
+    async def embed_batch_async(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts without blocking the event loop
+
+        OpenAI batches are requested concurrently; local and static models
+        run in a worker thread.
+
+        Args:
+            texts: List of texts to embed
 
-    def _embed_local(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        Returns:
+            float32 array of shape (len(texts), dimension), L2-normalized
+        """
+        if self.provider == "openai":
+            return await self._embed_openai_async(texts)
+        return await asyncio.to_thread(self.embed_batch, texts)
+
+    def _embed_local(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
         """Generate embeddings using local model"""
-        embeddings = self.model.encode(
+        if self.autocast_dtype is not None:
+            import torch
+
+            with torch.autocast(device_type=self.device_type, dtype=self.autocast_dtype):
+                embeddings = self._encode_local(texts, batch_size)
+        else:
+            embeddings = self._encode_local(texts, batch_size)
+
+        # FP16/BF16 outputs are widened back for pgvector and numpy math
+        return embeddings.astype(np.float32, copy=False)
+
+    def _encode_local(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run the local model over texts"""
+        # encode() length-sorts the texts, so each batch carries little padding
+        return self.model.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=len(texts) > 10,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
-        return embeddings.tolist()
 
-    def _embed_openai(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+    def _embed_static(self, texts: List[str], batch_size: int = 1024) -> np.ndarray:
+        """Generate embeddings using static model"""
+        embeddings = self.model.encode(texts, batch_size=batch_size)
+        return self.normalize(embeddings)
+
+    def _embed_openai(self, texts: List[str], batch_size: int = 100) -> np.ndarray:
         """Generate embeddings using OpenAI API"""
         all_embeddings = []
 
@@ -97,13 +311,49 @@ class EmbeddingService:
                     input=batch
                 )
 
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
+                # OpenAI embeddings are already unit length
+                all_embeddings.append(
+                    np.asarray([item.embedding for item in response.data], dtype=np.float32)
+                )
 
             except Exception as e:
                 raise RuntimeError(f"OpenAI embedding error: {str(e)}")
 
-        return all_embeddings
+        if not all_embeddings:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        return np.concatenate(all_embeddings)
+
+    async def _embed_openai_async(
+        self,
+        texts: List[str],
+        batch_size: int = 100,
+        max_concurrency: int = 8
+    ) -> np.ndarray:
+        """Generate embeddings using OpenAI API, with batches in flight concurrently"""
+        # Bound in-flight requests to stay within rate limits
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def embed(batch: List[str]) -> np.ndarray:
+            async with semaphore:
+                response = await self.aclient.embeddings.create(
+                    model=self.model_name,
+                    input=batch
+                )
+            return np.asarray([item.embedding for item in response.data], dtype=np.float32)
+
+        try:
+            all_embeddings = await asyncio.gather(*[
+                embed(texts[i:i + batch_size])
+                for i in range(0, len(texts), batch_size)
+            ])
+        except Exception as e:
+            raise RuntimeError(f"OpenAI embedding error: {str(e)}")
+
+        if not all_embeddings:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        return np.concatenate(all_embeddings)
 
     def similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
@@ -116,23 +366,90 @@ class EmbeddingService:
         Returns:
             Similarity score between -1 and 1
         """
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        return cosine(embedding1, embedding2)
+
+    def similarity_batch(self, query: np.ndarray, corpus: np.ndarray, normalized: bool = False) -> np.ndarray:
+        """
+        Cosine similarity of one query against many embeddings
+
+        Args:
+            query: Query vector of shape (D,)
+            corpus: Embedding matrix of shape (N, D)
+            normalized: Set when both inputs are already L2-normalized
+
+        Returns:
+            float32 array of N similarity scores
+        """
+        if not normalized:
+            return cosine_rows(query, corpus)
+
+        # Pre-normalized inputs reduce to a single BLAS matrix-vector product
+        return np.asarray(corpus, dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+
+    def embed_batch_int8(self, texts: List[str], ranges: np.ndarray = None) -> np.ndarray:
+        """
+        Generate int8 scalar-quantized embeddings (4x smaller than float32)
+
+        Args:
+            texts: List of texts to embed
+            ranges: Optional (2, D) per-dimension [min; max] calibration ranges;
+                    computed from this batch when omitted
+
+        Returns:
+            int8 array of shape (len(texts), dimension)
+        """
+        return self.quantize_int8(self.embed_batch(texts), ranges)
+
+    def embed_batch_binary(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate sign-bit binary embeddings (32x smaller than float32)
+
+        Returns:
+            uint8 array of shape (len(texts), ceil(dimension / 8))
+        """
+        return self.quantize_binary(self.embed_batch(texts))
 
-        # Cosine similarity
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
+    @staticmethod
+    def quantize_int8(embeddings: np.ndarray, ranges: np.ndarray = None) -> np.ndarray:
+        """Map each dimension's [min, max] calibration range onto [-128, 127]"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if ranges is None:
+            ranges = np.stack([embeddings.min(axis=0), embeddings.max(axis=0)])
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        low, high = ranges
+        scale = np.where(high > low, high - low, 1) / 255
+        quantized = np.rint((embeddings - low) / scale) - 128
+        return np.clip(quantized, -128, 127).astype(np.int8)
+
+    @staticmethod
+    def quantize_binary(embeddings: np.ndarray) -> np.ndarray:
+        """Pack the sign bit of each dimension, 8 dimensions per byte"""
+        return np.packbits(np.asarray(embeddings) > 0, axis=-1)
+
+    @staticmethod
+    def hamming_distance(query: np.ndarray, corpus: np.ndarray) -> np.ndarray:
+        """
+        Hamming distances between a packed binary query (B,) and corpus (N, B)
+
+        Lower is more similar; approximates cosine ranking for normalized embeddings.
+        """
+        return np.unpackbits(np.bitwise_xor(corpus, query), axis=-1).sum(axis=-1)
 
-        return float(dot_product / (norm1 * norm2))
+    @staticmethod
+    def normalize(embeddings: np.ndarray) -> np.ndarray:
+        """L2-normalize a vector or each row of a matrix (zero rows stay zero)"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
 
     def get_dimension(self) -> int:
         """Get the dimension of embeddings produced by this service"""
         return self.dimension
 
 
-# Singleton instance
-embedding_service = EmbeddingService()
+@lru_cache(maxsize=1)
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get the shared embedding service, loading the model on first use
+    """
+    return EmbeddingService()
@@ -0,0 +1,97 @@
+"""
+Lecture Ingestion Service
+Extracts, chunks and embeds uploaded lecture PDFs outside the request cycle
+"""
+from typing import Dict, Iterator, List
+from itertools import islice
+import os
+import uuid
+from uuid6 import uuid7
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import Lecture
+from .pdf_processor import pdf_processor
+from .embeddings import get_embedding_service
+from .dashboard_view import refresh_module_dashboard
+from .module_index import module_index
+from ..utils.chunking import text_chunker
+
+# Chunks embedded and copied into the database per round
+INGEST_BATCH_SIZE = 256
+
+
+def _next_batch(chunks: Iterator[Dict]) -> List[Dict]:
+    """Take the next INGEST_BATCH_SIZE chunks (empty when exhausted)"""
+    return list(islice(chunks, INGEST_BATCH_SIZE))
+
+
+async def process_lecture(lecture_id: uuid.UUID, file_path: str):
+    """
+    Extract text, chunk and embed a lecture, then mark it ready
+
+    Runs as a FastAPI background task after the upload has been accepted.
+    CPU-bound steps run in the threadpool so the event loop stays responsive.
+
+    Args:
+        lecture_id: ID of the lecture row created by the upload
+        file_path: Path of the saved PDF
+    """
+    async with SessionLocal() as db:
+        lecture = await db.get(Lecture, lecture_id)
+        if lecture is None:
+            return
+
+        module_code = lecture.module_code
+
+        try:
+            # Extract text from PDF
+            slides, num_pages = await run_in_threadpool(
+                pdf_processor.extract_text_from_pdf, file_path
+            )
+
+            # Chunk, embed and COPY in fixed-size batches pulled from the chunk
+            # generator, so only one batch of chunks and embeddings is in memory
+            conn = await db.connection()
+            raw_conn = await conn.get_raw_connection()
+            chunks = text_chunker.iter_chunks_by_slide(slides)
+            total = 0
+
+            # Tokenizing for the chunk windows is CPU-bound, so batches are
+            # pulled from the generator in the threadpool
+            while batch := await run_in_threadpool(_next_batch, chunks):
+                texts = [chunk["content"] for chunk in batch]
+                embeddings = await get_embedding_service().embed_batch_async(texts)
+
+                # Each embedding row is a float32 array that the halfvec codec
+                # packs in one step
+                await raw_conn.driver_connection.copy_records_to_table(
+                    "chunks",
+                    records=[
+                        (uuid7(), lecture.id, chunk["content"], chunk["slide_number"], embedding)
+                        for chunk, embedding in zip(batch, embeddings)
+                    ],
+                    columns=["id", "lecture_id", "content", "slide_number", "embedding"]
+                )
+                total += len(batch)
+
+            print(f"Created {total} chunks for lecture {lecture.id}")
+
+            lecture.num_pages = num_pages
+            lecture.status = "ready"
+            await db.commit()
+
+        except Exception as e:
+            print(f"Processing failed for lecture {lecture_id}: {str(e)}")
+            await db.rollback()
+
+            lecture.status = "failed"
+            await db.commit()
+
+            # Clean up file if processing fails
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    # Reload the module's in-memory index with the new chunks on its next query
+    module_index.invalidate(module_code)
+    await refresh_module_dashboard()
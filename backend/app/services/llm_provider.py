@@ -3,14 +3,64 @@ LLM Provider Abstraction Layer
 Supports Ollama (local), OpenAI, and Anthropic
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
+from functools import lru_cache
+import asyncio
+import json
+import httpx
 import requests
-from openai import OpenAI
-from anthropic import Anthropic
+from requests.adapters import HTTPAdapter
+import openai
+import anthropic
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 
 from ..config import settings
 
 
+# Hosted API clients are shared per key so their connection pools (and TLS
+# sessions) outlive individual provider instances. Connections are kept alive
+# well past httpx's 5s default, and HTTP/2 multiplexes concurrent requests
+# over them
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=60)
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(api_key: str) -> OpenAI:
+    """Get a process-wide OpenAI client for this API key"""
+    return OpenAI(
+        api_key=api_key,
+        http_client=openai.DefaultHttpxClient(limits=HTTP_LIMITS, http2=True)
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_async_openai_client(api_key: str) -> AsyncOpenAI:
+    """Get a process-wide async OpenAI client for this API key"""
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=openai.DefaultAsyncHttpxClient(limits=HTTP_LIMITS, http2=True)
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_anthropic_client(api_key: str) -> Anthropic:
+    """Get a process-wide Anthropic client for this API key"""
+    return Anthropic(
+        api_key=api_key,
+        http_client=anthropic.DefaultHttpxClient(limits=HTTP_LIMITS, http2=True)
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_async_anthropic_client(api_key: str) -> AsyncAnthropic:
+    """Get a process-wide async Anthropic client for this API key"""
+    return AsyncAnthropic(
+        api_key=api_key,
+        http_client=anthropic.DefaultAsyncHttpxClient(limits=HTTP_LIMITS, http2=True)
+    )
+
+
 class LLMProvider(ABC):
     """Base class for LLM providers"""
 
@@ -19,6 +69,14 @@ class LLMProvider(ABC):
         """Generate text completion"""
         pass
 
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text completion without blocking the event loop"""
+        return await asyncio.to_thread(self.generate, prompt, system_prompt, **kwargs)
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Generate text completion, yielding text fragments as they arrive"""
+        yield self.generate(prompt, system_prompt, **kwargs)
+
     @abstractmethod
     def check_health(self) -> bool:
         """Check if the provider is available"""
@@ -32,34 +90,63 @@ class OllamaProvider(LLMProvider):
         self.base_url = base_url or settings.ollama_base_url
         self.model = model or settings.ollama_model
 
+        # Persistent session keeps connections to Ollama alive between calls
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
     def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate text using Ollama"""
         url = f"{self.base_url}/api/generate"
+        payload = self._build_payload(prompt, system_prompt, stream=False, **kwargs)
+
+        try:
+            response = self._session.post(url, json=payload, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("response", "")
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Ollama API error: {str(e)}")
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Generate text using Ollama, yielding tokens as they are produced"""
+        url = f"{self.base_url}/api/generate"
+        payload = self._build_payload(prompt, system_prompt, stream=True, **kwargs)
 
+        try:
+            with self._session.post(url, json=payload, timeout=60, stream=True) as response:
+                response.raise_for_status()
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Ollama API error: {str(e)}")
+
+    def _build_payload(self, prompt: str, system_prompt: Optional[str], stream: bool, **kwargs) -> Dict:
+        """Build an /api/generate request body"""
         # Build the full prompt
         full_prompt = prompt
         if system_prompt:
             full_prompt = f"{system_prompt}\n\n{prompt}"
 
-        payload = {
+        return {
             "model": self.model,
             "prompt": full_prompt,
-            "stream": False,
+            "stream": stream,
             **kwargs
         }
 
-        try:
-            response = requests.post(url, json=payload, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "")
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Ollama API error: {str(e)}")
-
     def check_health(self) -> bool:
         """Check if Ollama is running"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
@@ -71,27 +158,58 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, api_key: str = None, model: str = "gpt-4"):
         self.api_key = api_key or settings.openai_api_key
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = _get_openai_client(self.api_key)
+        self.aclient = _get_async_openai_client(self.api_key)
 
     def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate text using OpenAI"""
-        messages = []
-
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        messages.append({"role": "user", "content": prompt})
-
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._build_messages(prompt, system_prompt),
+                **kwargs
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using OpenAI's async client"""
+        try:
+            response = await self.aclient.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt, system_prompt),
                 **kwargs
             )
             return response.choices[0].message.content
         except Exception as e:
             raise RuntimeError(f"OpenAI API error: {str(e)}")
 
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Generate text using OpenAI, yielding tokens as they are produced"""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt, system_prompt),
+                stream=True,
+                **kwargs
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict]:
+        """Build the chat message list"""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     def check_health(self) -> bool:
         """Check if OpenAI API is available"""
         try:
@@ -107,7 +225,8 @@ class AnthropicProvider(LLMProvider):
     def __init__(self, api_key: str = None, model: str = "claude-3-5-sonnet-20241022"):
         self.api_key = api_key or settings.anthropic_api_key
         self.model = model
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = _get_anthropic_client(self.api_key)
+        self.aclient = _get_async_anthropic_client(self.api_key)
 
     def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate text using Anthropic"""
@@ -124,23 +243,50 @@ class AnthropicProvider(LLMProvider):
         except Exception as e:
             raise RuntimeError(f"Anthropic API error: {str(e)}")
 
-    def check_health(self) -> bool:
-        """Check if Anthropic API is available"""
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using Anthropic's async client"""
         try:
-            # Make a minimal request to check API availability
-            self.client.messages.create(
+            response = await self.aclient.messages.create(
                 model=self.model,
-                max_tokens=1,
-                messages=[{"role": "user", "content": "test"}]
+                max_tokens=kwargs.get("max_tokens", 2048),
+                system=system_prompt or "You are a helpful assistant.",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
             )
+            return response.content[0].text
+        except Exception as e:
+            raise RuntimeError(f"Anthropic API error: {str(e)}")
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Generate text using Anthropic, yielding tokens as they are produced"""
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=kwargs.get("max_tokens", 2048),
+                system=system_prompt or "You are a helpful assistant.",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                yield from stream.text_stream
+        except Exception as e:
+            raise RuntimeError(f"Anthropic API error: {str(e)}")
+
+    def check_health(self) -> bool:
+        """Check if Anthropic API is available"""
+        try:
+            # Listing models authenticates without spending tokens
+            self.client.models.list(limit=1)
             return True
         except Exception:
             return False
 
 
+@lru_cache(maxsize=1)
 def get_llm_provider() -> LLMProvider:
     """
-    Factory function to get the configured LLM provider
+    Get the configured LLM provider, created on first use and then shared
     """
     provider_name = settings.llm_provider.lower()
 
@@ -152,7 +298,3 @@ def get_llm_provider() -> LLMProvider:
         return AnthropicProvider()
     else:
         raise ValueError(f"Unknown LLM provider: {provider_name}")
-
-
-# Singleton instance (optional, can create new instances as needed)
-llm_provider = get_llm_provider()
@@ -0,0 +1,278 @@
+"""
+In-Memory Module Index
+Exact chunk search over a module's embedding matrix held in process memory
+"""
+from typing import List, Dict, Optional
+from dataclasses import dataclass
+from collections import OrderedDict
+import asyncio
+import uuid
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from ..config import settings
+
+
+# Raw SQL so embeddings arrive as pgvector HalfVector values (binary codec)
+# rather than going through the ORM's list-of-floats conversion
+MODULE_CHUNKS_SQL = text("""
+    SELECT
+        c.id,
+        c.lecture_id,
+        c.content,
+        c.slide_number,
+        c.embedding,
+        l.week_number,
+        l.title AS lecture_title
+    FROM chunks c
+    JOIN lectures l ON l.id = c.lecture_id
+    WHERE l.module_code = :module_code
+      AND c.embedding IS NOT NULL
+""")
+
+# Rows fetched per round-trip while loading a module
+LOAD_BATCH_SIZE = 2048
+
+MODULE_CHUNK_COUNT_SQL = text("""
+    SELECT count(*)
+    FROM chunks c
+    JOIN lectures l ON l.id = c.lecture_id
+    WHERE l.module_code = :module_code
+""")
+
+# Changes whenever a lecture of the module is added, deleted or finishes
+# processing, so a worker notices changes made by other workers
+MODULE_SIGNATURE_SQL = text("""
+    SELECT md5(string_agg(l.id::text || ':' || l.status, ',' ORDER BY l.id))
+    FROM lectures l
+    WHERE l.module_code = :module_code
+""")
+
+
+@dataclass
+class ModuleChunks:
+    """
+    A module's chunks in struct-of-arrays layout
+
+    Row i of every per-chunk field describes the same chunk; lecture_index
+    maps each chunk into the per-lecture fields.
+    """
+    chunk_ids: List[uuid.UUID]
+    contents: List[str]
+    slide_numbers: np.ndarray  # (N,) int32
+    lecture_index: np.ndarray  # (N,) int32
+    embeddings: np.ndarray  # (N, D) float32, C-contiguous
+    lecture_ids: List[uuid.UUID]
+    lecture_titles: List[str]
+    lecture_weeks: np.ndarray  # (L,) int32
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+
+async def load_module_chunks(module_code: str, db: AsyncSession) -> ModuleChunks:
+    """
+    Load all chunks for a module with metadata
+
+    Rows are streamed LOAD_BATCH_SIZE at a time and each batch's embeddings
+    are copied into a float32 block straight from pgvector's binary halfvec
+    values. IDs stay asyncpg UUIDs (stringified only where responses are
+    built) and lecture metadata is stored once per lecture, not per chunk.
+    """
+    result = await db.stream(
+        MODULE_CHUNKS_SQL.execution_options(yield_per=LOAD_BATCH_SIZE),
+        {"module_code": module_code.upper()}
+    )
+
+    chunk_ids, contents, slide_numbers, lecture_index = [], [], [], []
+    lecture_ids, lecture_titles, lecture_weeks = [], [], []
+    lecture_positions: Dict[uuid.UUID, int] = {}
+    blocks = []
+
+    async for rows in result.partitions():
+        block = np.empty((len(rows), rows[0].embedding.dimensions()), dtype=np.float32)
+
+        for i, (chunk_id, lecture_id, content, slide_number, embedding, week_number, lecture_title) in enumerate(rows):
+            position = lecture_positions.get(lecture_id)
+            if position is None:
+                position = lecture_positions[lecture_id] = len(lecture_ids)
+                lecture_ids.append(lecture_id)
+                lecture_titles.append(lecture_title)
+                lecture_weeks.append(week_number)
+
+            chunk_ids.append(chunk_id)
+            contents.append(content)
+            slide_numbers.append(slide_number)
+            lecture_index.append(position)
+            block[i] = embedding.to_numpy()
+
+        blocks.append(block)
+
+    if len(blocks) == 1:
+        embeddings = blocks[0]
+    elif blocks:
+        embeddings = np.concatenate(blocks)
+    else:
+        embeddings = np.empty((0, settings.embedding_dimension), dtype=np.float32)
+
+    return ModuleChunks(
+        chunk_ids=chunk_ids,
+        contents=contents,
+        slide_numbers=np.asarray(slide_numbers, dtype=np.int32),
+        lecture_index=np.asarray(lecture_index, dtype=np.int32),
+        embeddings=embeddings,
+        lecture_ids=lecture_ids,
+        lecture_titles=lecture_titles,
+        lecture_weeks=np.asarray(lecture_weeks, dtype=np.int32)
+    )
+
+
+@dataclass
+class _CachedModule:
+    signature: Optional[str]
+    # None when the module is over the size limit and is searched in pgvector
+    chunks: Optional[ModuleChunks]
+    chunk_weeks: Optional[np.ndarray] = None  # (N,) int32
+
+
+class ModuleIndex:
+    """
+    Per-module embedding matrices for exact search without pgvector
+
+    Course-scale modules fit comfortably in RAM, where ranking every chunk is
+    a single matrix-vector product. Modules are loaded on first search, kept
+    in an LRU of max_modules entries and reloaded when their lectures change.
+    Opt-in (MODULE_INDEX_MAX_CHUNKS): searches served here bypass pgvector, so
+    HNSW tuning and binary rerank don't apply, and every search costs one
+    signature query to detect changes.
+    """
+
+    def __init__(self, max_chunks: int = None, max_modules: int = None):
+        self.max_chunks = settings.module_index_max_chunks if max_chunks is None else max_chunks
+        self.max_modules = settings.module_index_max_modules if max_modules is None else max_modules
+        self._cache: "OrderedDict[str, _CachedModule]" = OrderedDict()
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+
+        # Binary rerank is a pgvector-side strategy; the two don't combine
+        if self.enabled and settings.retrieval_binary_rerank:
+            print("RETRIEVAL_BINARY_RERANK is set, disabling the in-memory module index")
+            self.max_chunks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_chunks > 0 and self.max_modules > 0
+
+    def invalidate(self, module_code: str):
+        """Drop a module so its next search reloads it"""
+        self._cache.pop(module_code.upper(), None)
+
+    async def search(
+        self,
+        query_embedding: np.ndarray,
+        module_code: str,
+        db: AsyncSession,
+        top_k: int,
+        max_week: Optional[int] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Retrieve the top_k chunks of a module by cosine similarity
+
+        Args:
+            query_embedding: L2-normalized query embedding
+            module_code: Module code to search in
+            db: Database session
+            top_k: Number of chunks to return
+            max_week: Only consider lectures up to this week
+
+        Returns:
+            Chunks in the same format as RAGEngine._retrieve_chunks, or None if
+            the module is too large to hold in memory
+        """
+        if not self.enabled:
+            return None
+
+        cached = await self._get_module(module_code.upper(), db)
+        if cached.chunks is None:
+            return None
+
+        module = cached.chunks
+        if len(module) == 0:
+            return []
+
+        # Stored and query embeddings are unit vectors, so the dot product is
+        # the cosine similarity
+        sims = module.embeddings @ np.asarray(query_embedding, dtype=np.float32)
+
+        if max_week:
+            visible = cached.chunk_weeks <= max_week
+            sims = np.where(visible, sims, -np.inf)
+            n = int(np.count_nonzero(visible))
+        else:
+            n = len(module)
+
+        k = min(top_k, n)
+        if k == 0:
+            return []
+
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+        top = top[np.argsort(-sims[top])]
+
+        chunks = []
+        for i in top.tolist():
+            position = module.lecture_index[i]
+            chunks.append({
+                "chunk_id": str(module.chunk_ids[i]),
+                "content": module.contents[i],
+                "slide_number": int(module.slide_numbers[i]),
+                "lecture_title": module.lecture_titles[position],
+                "week_number": int(module.lecture_weeks[position]),
+                "lecture_id": str(module.lecture_ids[position]),
+                "similarity": float(sims[i])
+            })
+
+        return chunks
+
+    async def _get_module(self, module_code: str, db: AsyncSession) -> _CachedModule:
+        """Return the cached module, (re)loading it if its lectures changed"""
+        signature = (await db.execute(
+            MODULE_SIGNATURE_SQL, {"module_code": module_code}
+        )).scalar_one_or_none()
+
+        cached = self._cache.get(module_code)
+        if cached is not None and cached.signature == signature:
+            self._cache.move_to_end(module_code)
+            return cached
+
+        # One load per module at a time, so concurrent first queries don't each
+        # load it; other modules load independently
+        async with self._load_locks.setdefault(module_code, asyncio.Lock()):
+            cached = self._cache.get(module_code)
+            if cached is not None and cached.signature == signature:
+                return cached
+
+            count = (await db.execute(
+                MODULE_CHUNK_COUNT_SQL, {"module_code": module_code}
+            )).scalar_one()
+
+            if count > self.max_chunks:
+                cached = _CachedModule(signature=signature, chunks=None)
+            else:
+                module = await load_module_chunks(module_code, db)
+                cached = _CachedModule(
+                    signature=signature,
+                    chunks=module,
+                    chunk_weeks=module.lecture_weeks[module.lecture_index]
+                )
+                print(f"Loaded {len(module)} chunks of {module_code} into the module index")
+
+            self._cache[module_code] = cached
+            self._cache.move_to_end(module_code)
+            while len(self._cache) > self.max_modules:
+                self._cache.popitem(last=False)
+
+            return cached
+
+
+# Global instance
+module_index = ModuleIndex()
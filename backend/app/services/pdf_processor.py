@@ -2,11 +2,135 @@
 PDF Processing Service
 Extract text from PDF files, preserve slide boundaries, and handle OCR
 """
-from typing import List, Dict, Tuple
-import PyPDF2
+from typing import List, Dict, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import re
+import threading
+import pypdfium2 as pdfium
 import pdfplumber
 from pathlib import Path
 
+from ..config import settings
+
+# Every PDF starts with this header
+PDF_MAGIC = b"%PDF-"
+
+# Readers accept the end-of-file marker anywhere in the last 1 KB
+PDF_EOF = b"%%EOF"
+PDF_TAIL_BYTES = 1024
+
+# Decks shorter than this are extracted inline; pool overhead isn't worth it
+PARALLEL_MIN_PAGES = 16
+
+# PDFium is not thread-safe; serialize in-process use (pool workers are separate processes)
+_pdfium_lock = threading.Lock()
+
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared pool for page extraction (spawned, so workers don't inherit torch threads)
+
+    Sized by PDF_NUM_WORKERS, defaulting to this server worker's share of the CPUs.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NULL_TABLE = str.maketrans("", "", "\x00")
+
+
+def _clean_text(text: str) -> str:
+    """Clean extracted text"""
+    if not text:
+        return ""
+
+    # Remove common PDF artifacts, then collapse excessive whitespace
+    return _WHITESPACE_RE.sub(" ", text.translate(_NULL_TABLE)).strip()
+
+
+def _pdfplumber_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract cleaned text for pages [start, stop) with pdfplumber"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return [_clean_text(pdf.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def _pdfium_document_pages(pdf: pdfium.PdfDocument, start: int, stop: int) -> List[str]:
+    """Extract cleaned text for pages [start, stop) from an open PDFium document"""
+    texts = []
+    with _pdfium_lock:
+        for i in range(start, stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(_clean_text(textpage.get_text_range()))
+            textpage.close()
+            page.close()
+    return texts
+
+
+def _pdfium_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract cleaned text for pages [start, stop) with PDFium"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return _pdfium_document_pages(pdf, start, stop)
+    finally:
+        pdf.close()
+
+
+def _extract_pages(
+    extract_range: Callable,
+    pdf_path: str,
+    num_pages: int,
+    inline: Callable = None
+) -> List[str]:
+    """
+    Run a page-range extractor, splitting large decks across the process pool
+
+    inline(start, stop), when given, extracts in-process from an already open
+    document instead of reopening the file.
+    """
+    if inline is None:
+        inline = lambda start, stop: extract_range(pdf_path, start, stop)
+
+    if num_pages < PARALLEL_MIN_PAGES:
+        return inline(0, num_pages)
+
+    # One contiguous page range per worker so each opens the PDF once
+    workers = settings.pdf_workers
+    step = -(-num_pages // workers)
+    starts = list(range(0, num_pages, step))
+    stops = [min(start + step, num_pages) for start in starts]
+
+    global _process_pool
+    try:
+        texts = []
+        for batch in _get_process_pool().map(extract_range, [pdf_path] * len(starts), starts, stops):
+            texts.extend(batch)
+        return texts
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and finish inline
+        print("PDF extraction pool broke, extracting inline")
+        _process_pool = None
+        return inline(0, num_pages)
+
+
+def _to_slides(texts: List[str]) -> List[Dict[str, any]]:
+    """Number extracted page texts as slides"""
+    return [
+        {"page_number": i, "content": text}
+        for i, text in enumerate(texts, start=1)
+    ]
+
 
 class PDFProcessor:
     """Service for processing PDF lecture files"""
@@ -25,105 +149,74 @@ class PDFProcessor:
             Tuple of (list of slides with content, total number of pages)
             Each slide dict contains: {"page_number": int, "content": str}
         """
+        pdf = None
         try:
+            # Parse the xref and page tree once; both extractors reuse it
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(pdf_path)
+                num_pages = len(pdf)
+
             # Try pdfplumber first (better text extraction)
-            slides = self._extract_with_pdfplumber(pdf_path)
+            slides = self._extract_with_pdfplumber(pdf_path, num_pages)
             if slides and any(slide["content"].strip() for slide in slides):
-                return slides, len(slides)
+                return slides, num_pages
 
-            # Fallback to PyPDF2
-            print("pdfplumber failed, trying PyPDF2...")
-            slides = self._extract_with_pypdf2(pdf_path)
+            # Fallback to PDFium
+            print("pdfplumber failed, trying PDFium...")
+            slides = self._extract_with_pdfium(pdf, pdf_path, num_pages)
             if slides and any(slide["content"].strip() for slide in slides):
-                return slides, len(slides)
+                return slides, num_pages
 
             # If both fail, return empty slides with page count
             print("Text extraction failed, might need OCR")
-            return self._get_empty_slides(pdf_path), len(slides) if slides else 0
+            return self._get_empty_slides(num_pages), num_pages
 
         except Exception as e:
             raise RuntimeError(f"PDF processing error: {str(e)}")
 
-    def _extract_with_pdfplumber(self, pdf_path: str) -> List[Dict[str, any]]:
-        """Extract text using pdfplumber (preferred method)"""
-        slides = []
+        finally:
+            if pdf is not None:
+                with _pdfium_lock:
+                    pdf.close()
 
+    def _extract_with_pdfplumber(self, pdf_path: str, num_pages: int) -> List[Dict[str, any]]:
+        """Extract text using pdfplumber (preferred method)"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages, start=1):
-                    text = page.extract_text() or ""
-
-                    # Clean up the text
-                    text = self._clean_text(text)
-
-                    slides.append({
-                        "page_number": i,
-                        "content": text
-                    })
-
-            return slides
+            return _to_slides(_extract_pages(_pdfplumber_page_range, pdf_path, num_pages))
 
         except Exception as e:
             print(f"pdfplumber extraction failed: {str(e)}")
             return []
 
-    def _extract_with_pypdf2(self, pdf_path: str) -> List[Dict[str, any]]:
-        """Extract text using PyPDF2 (fallback method)"""
-        slides = []
-
+    def _extract_with_pdfium(
+        self,
+        pdf: pdfium.PdfDocument,
+        pdf_path: str,
+        num_pages: int
+    ) -> List[Dict[str, any]]:
+        """Extract text using PDFium (fallback method)"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-
-                for i, page in enumerate(pdf_reader.pages, start=1):
-                    text = page.extract_text() or ""
-
-                    # Clean up the text
-                    text = self._clean_text(text)
-
-                    slides.append({
-                        "page_number": i,
-                        "content": text
-                    })
-
-            return slides
+            return _to_slides(_extract_pages(
+                _pdfium_page_range,
+                pdf_path,
+                num_pages,
+                inline=lambda start, stop: _pdfium_document_pages(pdf, start, stop)
+            ))
 
         except Exception as e:
-            print(f"PyPDF2 extraction failed: {str(e)}")
+            print(f"PDFium extraction failed: {str(e)}")
             return []
 
-    def _get_empty_slides(self, pdf_path: str) -> List[Dict[str, any]]:
+    def _get_empty_slides(self, num_pages: int) -> List[Dict[str, any]]:
         """Get empty slides when extraction fails (for OCR later)"""
-        slides = []
-
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-
-                for i in range(1, num_pages + 1):
-                    slides.append({
-                        "page_number": i,
-                        "content": "[OCR required - scanned image]"
-                    })
-
-            return slides
-
-        except Exception:
-            return []
+        return [
+            {"page_number": i, "content": "[OCR required - scanned image]"}
+            for i in range(1, num_pages + 1)
+        ]
 
     def _clean_text(self, text: str) -> str:
         """Clean extracted text"""
-        if not text:
-            return ""
-
-        # Remove excessive whitespace
-        text = " ".join(text.split())
-
-        # Remove common PDF artifacts
-        text = text.replace("\x00", "")
-
-        return text.strip()
+        return _clean_text(text)
 
     def extract_text_with_ocr(self, pdf_path: str) -> Tuple[List[Dict[str, any]], int]:
         """
@@ -164,9 +257,16 @@ class PDFProcessor:
         except Exception as e:
             raise RuntimeError(f"OCR processing error: {str(e)}")
 
+    def has_pdf_header(self, data: bytes) -> bool:
+        """Cheap check that data begins with the PDF magic bytes"""
+        return data[:len(PDF_MAGIC)] == PDF_MAGIC
+
     def validate_pdf(self, pdf_path: str) -> bool:
         """
-        Validate that the file is a readable PDF
+        Validate that the file looks like a complete PDF
+
+        Only the header and trailer bytes are read; files that pass but fail
+        to parse are marked as failed during background processing.
 
         Args:
             pdf_path: Path to the PDF file
@@ -176,9 +276,13 @@ class PDFProcessor:
         """
         try:
             with open(pdf_path, 'rb') as file:
-                PyPDF2.PdfReader(file)
-            return True
-        except Exception:
+                if not self.has_pdf_header(file.read(len(PDF_MAGIC))):
+                    return False
+
+                # A truncated upload has no end-of-file marker
+                file.seek(max(0, os.fstat(file.fileno()).st_size - PDF_TAIL_BYTES))
+                return PDF_EOF in file.read(PDF_TAIL_BYTES)
+        except OSError:
             return False
 
     def get_pdf_info(self, pdf_path: str) -> Dict[str, any]:
@@ -192,17 +296,21 @@ class PDFProcessor:
             Dictionary with PDF metadata
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = pdf_reader.metadata
-
-                return {
-                    "num_pages": len(pdf_reader.pages),
-                    "author": metadata.get("/Author", "Unknown") if metadata else "Unknown",
-                    "title": metadata.get("/Title", "Unknown") if metadata else "Unknown",
-                    "subject": metadata.get("/Subject", "") if metadata else "",
-                    "creator": metadata.get("/Creator", "") if metadata else "",
-                }
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    num_pages = len(pdf)
+                    metadata = pdf.get_metadata_dict()
+                finally:
+                    pdf.close()
+
+            return {
+                "num_pages": num_pages,
+                "author": metadata.get("Author") or "Unknown",
+                "title": metadata.get("Title") or "Unknown",
+                "subject": metadata.get("Subject", ""),
+                "creator": metadata.get("Creator", ""),
+            }
 
         except Exception as e:
             return {
@@ -2,28 +2,82 @@
 RAG (Retrieval-Augmented Generation) Engine
 Implements question answering with temporal awareness
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
+import asyncio
+import re
 import time
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, noload
+from sqlalchemy import select, and_, text, func, cast
+from pgvector.sqlalchemy import BIT, HALFVEC
 
+from ..database import SessionLocal
 from ..models import Lecture, Chunk
-from .embeddings import embedding_service
-from .llm_provider import llm_provider
+from .embeddings import get_embedding_service
+from .llm_provider import get_llm_provider
+from .module_index import module_index
+from .vector_index import get_ef_search
+from ..utils.tokens import count_tokens
 from ..config import settings
 
 
+# Generation limit for answers, reserved out of the LLM context window
+ANSWER_MAX_TOKENS = 500
+
+NO_CONTEXT_ANSWER = "I couldn't find any relevant information in the uploaded lectures for this module."
+
+# Static instructions live in the system prompts, ahead of any per-request
+# text. Providers only cache prefixes of 1024+ tokens, so at their current
+# length these prompts are not cached; the ordering keeps that possible
+ANSWER_SYSTEM_PROMPT = """You are an intelligent teaching assistant helping university students understand lecture content. Your role is to:
+1. Synthesize information from multiple lecture sources
+2. Explain concepts clearly and accurately
+3. Show how ideas connect across lectures
+4. Acknowledge when information is incomplete
+5. Maintain academic rigor while being accessible
+
+When answering a question from lecture content:
+- Use information from the sources to provide a comprehensive answer
+- When referencing information, mention which source (e.g., "According to Source 1...")
+- Provide a clear, well-structured answer
+- Cite sources when making specific claims
+- If information from multiple lectures is relevant, explain how concepts connect
+- If the sources don't contain enough information to fully answer the question, acknowledge this
+- Maintain academic tone appropriate for university-level content"""
+
+SUMMARY_SYSTEM_PROMPT = """You are an expert at synthesizing educational content across multiple sources.
+
+When summarizing a topic from lecture content, provide:
+1. A synthesis of how this topic is introduced and developed across the lectures
+2. Key concepts and definitions
+3. How the topic evolves or is applied in later lectures
+4. 3-5 bullet points of the most important takeaways
+
+Format your response as:
+SUMMARY: <comprehensive summary>
+KEY POINTS:
+- <point 1>
+- <point 2>
+- <point 3>
+..."""
+
+_SUMMARY_RE = re.compile(r"SUMMARY:(.*)", re.S)
+_KEY_POINTS_RE = re.compile(r"^[ \t]*KEY POINTS:(.*)", re.S | re.M)
+_BULLET_RE = re.compile(r"^[ \t]*-[ \t]*(.*?)\s*$", re.M)
+
+
 class RAGEngine:
     """Service for RAG-based question answering"""
 
     def __init__(self):
         self.top_k = settings.retrieval_top_k
 
-    def query(
+    async def query(
         self,
         query: str,
         module_code: str,
-        db: Session,
+        db: AsyncSession,
         top_k: int = None,
         temporal_filter: bool = True,
         current_week: Optional[int] = None
@@ -50,10 +104,10 @@ class RAGEngine:
         print(f"Module: {module_code}, Top-K: {top_k}, Temporal Filter: {temporal_filter}")
 
         # Generate query embedding
-        query_embedding = embedding_service.embed_text(query)
+        query_embedding = get_embedding_service().embed_text(query)
 
         # Retrieve relevant chunks
-        retrieved_chunks = self._retrieve_chunks(
+        retrieved_chunks = await self._retrieve_chunks(
             query_embedding=query_embedding,
             module_code=module_code,
             db=db,
@@ -64,13 +118,15 @@ class RAGEngine:
 
         if not retrieved_chunks:
             return {
-                "answer": "I couldn't find any relevant information in the uploaded lectures for this module.",
+                "answer": NO_CONTEXT_ANSWER,
                 "sources": [],
                 "processing_time": time.time() - start_time
             }
 
         print(f"Retrieved {len(retrieved_chunks)} chunks")
 
+        retrieved_chunks = self._fit_context(query, retrieved_chunks)
+
         # Generate answer
         answer = self._generate_answer(query, retrieved_chunks)
 
@@ -86,11 +142,55 @@ class RAGEngine:
             "processing_time": processing_time
         }
 
-    def _retrieve_chunks(
+    async def query_stream(
         self,
-        query_embedding: List[float],
+        query: str,
         module_code: str,
-        db: Session,
+        db: AsyncSession,
+        top_k: int = None,
+        temporal_filter: bool = True,
+        current_week: Optional[int] = None
+    ) -> Tuple[List[Dict], Iterator[str]]:
+        """
+        Answer a question using RAG, streaming the answer
+
+        Retrieval completes before this returns; the LLM is only called as
+        the returned iterator is consumed, so it needs no database session.
+
+        Returns:
+            Tuple of (sources, iterator of answer text fragments)
+        """
+        top_k = top_k or self.top_k
+
+        query_embedding = get_embedding_service().embed_text(query)
+
+        retrieved_chunks = await self._retrieve_chunks(
+            query_embedding=query_embedding,
+            module_code=module_code,
+            db=db,
+            top_k=top_k,
+            temporal_filter=temporal_filter,
+            current_week=current_week
+        )
+
+        if not retrieved_chunks:
+            return [], iter([NO_CONTEXT_ANSWER])
+
+        retrieved_chunks = self._fit_context(query, retrieved_chunks)
+
+        tokens = get_llm_provider().generate_stream(
+            prompt=self._build_answer_prompt(query, retrieved_chunks),
+            system_prompt=ANSWER_SYSTEM_PROMPT,
+            temperature=0.7,
+            max_tokens=ANSWER_MAX_TOKENS
+        )
+        return self._format_sources(retrieved_chunks), tokens
+
+    async def _retrieve_chunks(
+        self,
+        query_embedding: np.ndarray,
+        module_code: str,
+        db: AsyncSession,
         top_k: int,
         temporal_filter: bool,
         current_week: Optional[int]
@@ -98,18 +198,45 @@ class RAGEngine:
         """
         Retrieve relevant chunks using vector similarity
 
-        Uses pgvector's cosine distance operator (<=>)
+        Uses pgvector's negative inner product operator (<#>), ordered
+        ascending so the HNSW index can serve the ORDER BY ... LIMIT. Stored
+        and query embeddings are L2-normalized, so this ranks exactly like
+        cosine distance without computing norms per row. When the in-memory
+        module index is enabled, modules small enough for it are ranked
+        exactly there instead.
         """
+        chunks = await module_index.search(
+            query_embedding,
+            module_code,
+            db,
+            top_k,
+            max_week=current_week if temporal_filter else None
+        )
+        if chunks is not None:
+            return chunks
+
+        # Widen the HNSW candidate list for this transaction to the auto-tuned
+        # tier's value (or the configured override)
+        ef_search = settings.hnsw_ef_search or get_ef_search()
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+        # The module and week filters are applied after the index scan; without
+        # iterative scanning a selective filter can leave fewer than top_k rows
+        iterative_scan = settings.hnsw_iterative_scan.lower()
+        if iterative_scan in ("relaxed_order", "strict_order"):
+            await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}"))
+
+        distance = Chunk.embedding.max_inner_product(query_embedding).label("distance")
+
         # Build base query
-        query = db.query(
+        query = select(
             Chunk.id,
             Chunk.content,
             Chunk.slide_number,
             Lecture.title.label("lecture_title"),
             Lecture.week_number,
             Lecture.id.label("lecture_id"),
-            # Cosine similarity (1 - cosine distance)
-            (1 - Chunk.embedding.cosine_distance(query_embedding)).label("similarity")
+            distance
         ).join(
             Lecture, Chunk.lecture_id == Lecture.id
         ).filter(
@@ -122,10 +249,16 @@ class RAGEngine:
         if temporal_filter and current_week:
             query = query.filter(Lecture.week_number <= current_week)
 
-        # Order by similarity and limit
-        results = query.order_by(
-            (1 - Chunk.embedding.cosine_distance(query_embedding)).desc()
-        ).limit(top_k).all()
+        if settings.retrieval_binary_rerank:
+            query = self._binary_shortlist(query, query_embedding, top_k)
+        else:
+            # Order by the selected distance, so it is computed once per row
+            query = query.order_by(distance)
+
+        results = (await db.execute(query.limit(top_k))).all()
+
+        # relaxed_order may return rows slightly out of distance order
+        results = sorted(results, key=lambda row: row.distance)
 
         # Convert to list of dicts
         chunks = []
@@ -137,53 +270,38 @@ class RAGEngine:
                 "lecture_title": row.lecture_title,
                 "week_number": row.week_number,
                 "lecture_id": str(row.lecture_id),
-                "similarity": float(row.similarity)
+                # Cosine similarity of unit vectors (<#> returns the negated dot product)
+                "similarity": -float(row.distance)
             })
 
         return chunks
 
-    def _generate_answer(self, query: str, chunks: List[Dict]) -> str:
-        """Generate answer using LLM with retrieved context"""
-        # Build context from retrieved chunks
-        context_parts = []
-        for i, chunk in enumerate(chunks, 1):
-            context_parts.append(
-                f"[Source {i} - {chunk['lecture_title']}, Week {chunk['week_number']}, Slide {chunk['slide_number']}]\n"
-                f"{chunk['content']}"
-            )
-
-        context = "\n\n".join(context_parts)
-
-        # Build prompt
-        prompt = f"""Answer the following question based on the provided lecture content. Use information from the sources to provide a comprehensive answer. When referencing information, mention which source (e.g., "According to Source 1...").
-
-Question: {query}
-
-Lecture Content:
-{context}
+    def _binary_shortlist(self, query, query_embedding: np.ndarray, top_k: int):
+        """
+        Rewrite a retrieval query as Hamming shortlist + inner product rerank
 
-Instructions:
-- Provide a clear, well-structured answer
-- Cite sources when making specific claims
-- If information from multiple lectures is relevant, explain how concepts connect
-- If the sources don't contain enough information to fully answer the question, acknowledge this
-- Maintain academic tone appropriate for university-level content
+        The inner query walks the binary-quantized HNSW index
+        (idx_chunks_embedding_bq_hnsw) for rerank_factor * top_k candidates;
+        the outer query orders just those by their exact halfvec inner product.
+        """
+        dim = Chunk.embedding.type.dim
+        chunk_bits = cast(func.binary_quantize(Chunk.embedding), BIT(dim))
+        query_bits = cast(func.binary_quantize(cast(query_embedding, HALFVEC(dim))), BIT(dim))
 
-Answer:"""
+        shortlist = query.order_by(
+            chunk_bits.hamming_distance(query_bits)
+        ).limit(top_k * settings.retrieval_rerank_factor).subquery()
 
-        system_prompt = """You are an intelligent teaching assistant helping university students understand lecture content. Your role is to:
-1. Synthesize information from multiple lecture sources
-2. Explain concepts clearly and accurately
-3. Show how ideas connect across lectures
-4. Acknowledge when information is incomplete
-5. Maintain academic rigor while being accessible"""
+        return select(shortlist).order_by(shortlist.c.distance)
 
+    def _generate_answer(self, query: str, chunks: List[Dict]) -> str:
+        """Generate answer using LLM with retrieved context"""
         try:
-            answer = llm_provider.generate(
-                prompt=prompt,
-                system_prompt=system_prompt,
+            answer = get_llm_provider().generate(
+                prompt=self._build_answer_prompt(query, chunks),
+                system_prompt=ANSWER_SYSTEM_PROMPT,
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=ANSWER_MAX_TOKENS
             )
             return answer.strip()
 
@@ -191,6 +309,55 @@ Answer:"""
             print(f"Error generating answer: {str(e)}")
             return "I encountered an error while generating the answer. Please try again."
 
+    def _fit_context(self, query: str, chunks: List[Dict]) -> List[Dict]:
+        """
+        Keep the most similar chunks that fit the LLM context window
+
+        Chunks arrive in similarity order, so the first one that would overflow
+        the budget ends the context; the best chunk is always kept. Tokens are
+        counted with the embedding model's tokenizer, which approximates the
+        LLM's closely enough for a budget.
+        """
+        budget = (
+            settings.llm_context_tokens
+            - ANSWER_MAX_TOKENS
+            - count_tokens(ANSWER_SYSTEM_PROMPT)
+            - count_tokens(self._build_answer_prompt(query, []))
+        )
+
+        used = 0
+        for i, chunk in enumerate(chunks):
+            used += count_tokens(self._format_context_part(i + 1, chunk))
+            if used > budget and i > 0:
+                print(f"Context budget reached, using {i} of {len(chunks)} chunks")
+                return chunks[:i]
+
+        return chunks
+
+    def _format_context_part(self, index: int, chunk: Dict) -> str:
+        """Format one retrieved chunk as a numbered source for the prompt"""
+        return (
+            f"[Source {index} - {chunk['lecture_title']}, Week {chunk['week_number']}, Slide {chunk['slide_number']}]\n"
+            f"{chunk['content']}"
+        )
+
+    def _build_answer_prompt(self, query: str, chunks: List[Dict]) -> str:
+        """Build the answer prompt from the retrieved context"""
+        # Build context from retrieved chunks
+        context = "\n\n".join(
+            self._format_context_part(i, chunk) for i, chunk in enumerate(chunks, 1)
+        )
+
+        # Build prompt; the instructions are in ANSWER_SYSTEM_PROMPT
+        return f"""Answer the following question based on the provided lecture content.
+
+Lecture Content:
+{context}
+
+Question: {query}
+
+Answer:"""
+
     def _format_sources(self, chunks: List[Dict]) -> List[Dict]:
         """Format retrieved chunks as source citations"""
         sources = []
@@ -206,11 +373,11 @@ Answer:"""
 
         return sources
 
-    def generate_topic_summary(
+    async def generate_topic_summary(
         self,
         topic_id: str,
         module_code: str,
-        db: Session
+        db: AsyncSession
     ) -> Dict:
         """
         Generate a comprehensive summary for a specific topic
@@ -225,38 +392,56 @@ Answer:"""
         """
         from ..models import Topic, TopicAppearance
 
-        # Get topic with appearances
-        topic = db.query(Topic).filter(
-            and_(
-                Topic.id == topic_id,
-                Topic.module_code == module_code.upper()
+        # Get topic (appearances are fetched separately below)
+        topic_query = db.execute(
+            select(Topic).options(
+                noload(Topic.appearances)
+            ).filter(
+                and_(
+                    Topic.id == topic_id,
+                    Topic.module_code == module_code.upper()
+                )
             )
-        ).first()
+        )
 
-        if not topic:
-            raise ValueError("Topic not found")
+        # Get all chunks related to this topic's appearances; each appearance's
+        # lecture is joined into the same SELECT for building the sources
+        appearances_query = self._fetch_all(
+            select(TopicAppearance).options(
+                joinedload(TopicAppearance.lecture)
+            ).filter(
+                TopicAppearance.topic_id == topic_id
+            ),
+            scalars=True
+        )
 
-        # Get all chunks related to this topic's appearances
-        appearances = db.query(TopicAppearance).filter(
-            TopicAppearance.topic_id == topic_id
-        ).all()
+        # Get chunks from these lectures; the subquery makes this independent
+        # of the appearances result so all three queries run concurrently
+        chunks_query = self._fetch_all(
+            select(
+                Chunk.content,
+                Chunk.slide_number,
+                Lecture.title.label("lecture_title"),
+                Lecture.week_number
+            ).join(
+                Lecture, Chunk.lecture_id == Lecture.id
+            ).filter(
+                Lecture.id.in_(
+                    select(TopicAppearance.lecture_id).filter(TopicAppearance.topic_id == topic_id)
+                )
+            ).order_by(
+                Lecture.week_number,
+                Chunk.slide_number
+            ).limit(20)  # Limit to avoid overwhelming the LLM
+        )
 
-        lecture_ids = [str(app.lecture_id) for app in appearances]
+        topic_result, appearances, chunks = await asyncio.gather(
+            topic_query, appearances_query, chunks_query
+        )
+        topic = topic_result.scalars().first()
 
-        # Get chunks from these lectures
-        chunks = db.query(
-            Chunk.content,
-            Chunk.slide_number,
-            Lecture.title.label("lecture_title"),
-            Lecture.week_number
-        ).join(
-            Lecture, Chunk.lecture_id == Lecture.id
-        ).filter(
-            Lecture.id.in_(lecture_ids)
-        ).order_by(
-            Lecture.week_number,
-            Chunk.slide_number
-        ).limit(20).all()  # Limit to avoid overwhelming the LLM
+        if not topic:
+            raise ValueError("Topic not found")
 
         # Build context
         context_parts = []
@@ -274,26 +459,12 @@ Answer:"""
 Topic Description: {topic.description}
 
 Lecture Content:
-{context}
-
-Please provide:
-1. A synthesis of how this topic is introduced and developed across the lectures
-2. Key concepts and definitions
-3. How the topic evolves or is applied in later lectures
-4. 3-5 bullet points of the most important takeaways
-
-Format your response as:
-SUMMARY: <comprehensive summary>
-KEY POINTS:
-- <point 1>
-- <point 2>
-- <point 3>
-..."""
+{context}"""
 
         try:
-            response = llm_provider.generate(
+            response = get_llm_provider().generate(
                 prompt=prompt,
-                system_prompt="You are an expert at synthesizing educational content across multiple sources.",
+                system_prompt=SUMMARY_SYSTEM_PROMPT,
                 temperature=0.7,
                 max_tokens=800
             )
@@ -324,27 +495,27 @@ KEY POINTS:
                 "sources": []
             }
 
+    async def _fetch_all(self, statement, scalars: bool = False) -> List:
+        """
+        Run a read-only query on its own pooled session
+
+        An AsyncSession runs one statement at a time, so independent queries
+        that should overlap each need a session (and connection) of their own.
+        """
+        async with SessionLocal() as session:
+            result = await session.execute(statement)
+            return result.scalars().all() if scalars else result.all()
+
     def _parse_summary_response(self, response: str) -> tuple:
         """Parse summary response from LLM"""
-        lines = response.strip().split("\n")
-        summary = ""
-        key_points = []
-        in_key_points = False
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith("SUMMARY:"):
-                summary = line.replace("SUMMARY:", "").strip()
-            elif line.startswith("KEY POINTS:"):
-                in_key_points = True
-            elif in_key_points and line.startswith("-"):
-                key_points.append(line[1:].strip())
-            elif in_key_points and not line.startswith("-") and line:
-                # Multi-line summary
-                if not summary:
-                    summary += " " + line
-                else:
-                    summary += " " + line
+        # Key points run to the end; the summary is whatever precedes them
+        key_points_match = _KEY_POINTS_RE.search(response)
+        head = response[:key_points_match.start()] if key_points_match else response
+        key_points = _BULLET_RE.findall(key_points_match.group(1)) if key_points_match else []
+
+        # Multi-line summaries are joined into one paragraph
+        summary_match = _SUMMARY_RE.search(head)
+        summary = " ".join(summary_match.group(1).split()) if summary_match else ""
 
         # If parsing failed, use entire response as summary
         if not summary:
@@ -3,11 +3,14 @@ Topic Detection Service
 Uses clustering to identify cross-lecture topics
 """
 from typing import List, Dict, Tuple
+import asyncio
+import re
 import numpy as np
-from sklearn.cluster import KMeans
-from collections import defaultdict, Counter
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sklearn.cluster import MiniBatchKMeans
+from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from uuid6 import uuid7
 
 try:
     import hdbscan
@@ -15,11 +18,31 @@ try:
 except ImportError:
     HDBSCAN_AVAILABLE = False
 
-from ..models import Lecture, Chunk, Topic, TopicAppearance
-from .llm_provider import llm_provider
+from ..models import Topic, TopicAppearance
+from .llm_provider import get_llm_provider
+from .module_index import ModuleChunks, load_module_chunks
 from ..config import settings
 
 
+# Shared by every labelling call and sent ahead of the excerpts (too short for
+# provider prompt caching on its own, which needs a 1024+ token prefix)
+TOPIC_LABEL_SYSTEM_PROMPT = """You are an expert at analyzing educational content and identifying key topics.
+
+For the lecture excerpts you are given, provide:
+1. A concise topic name (2-5 words)
+2. A brief description (1 sentence)
+
+Format your response as:
+TOPIC: <topic name>
+DESCRIPTION: <description>"""
+
+# In-flight LLM requests while labelling clusters
+LABEL_CONCURRENCY = 8
+
+_TOPIC_RE = re.compile(r"^[ \t]*TOPIC:[ \t]*(.*?)[ \t\r]*$", re.M)
+_DESCRIPTION_RE = re.compile(r"^[ \t]*DESCRIPTION:[ \t]*(.*?)[ \t\r]*$", re.M)
+
+
 class TopicDetector:
     """Service for detecting topics across lectures"""
 
@@ -27,8 +50,10 @@ class TopicDetector:
         self.clustering_method = clustering_method or settings.clustering_method
         self.min_cluster_size = min_cluster_size or settings.min_cluster_size
         self.min_samples = settings.min_samples
+        # Seeded like K-Means so repeated runs sample the same label excerpts
+        self.rng = np.random.default_rng(42)
 
-    def detect_topics(self, module_code: str, db: Session) -> List[Dict]:
+    async def detect_topics(self, module_code: str, db: AsyncSession) -> List[Dict]:
         """
         Detect topics across all lectures in a module
 
@@ -42,66 +67,36 @@ class TopicDetector:
         print(f"Starting topic detection for module: {module_code}")
 
         # Get all chunks for this module with their embeddings
-        chunks = self._get_module_chunks(module_code, db)
+        module = await self._get_module_chunks(module_code, db)
 
-        if len(chunks) < self.min_cluster_size:
+        if len(module) < self.min_cluster_size:
             raise ValueError(
                 f"Not enough chunks for clustering. "
-                f"Found {len(chunks)}, need at least {self.min_cluster_size}"
+                f"Found {len(module)}, need at least {self.min_cluster_size}"
             )
 
-        print(f"Found {len(chunks)} chunks from {len(set(c['lecture_id'] for c in chunks))} lectures")
+        print(f"Found {len(module)} chunks from {len(module.lecture_ids)} lectures")
 
-        # Extract embeddings
-        embeddings = np.array([chunk["embedding"] for chunk in chunks])
-        print(f"Embeddings shape: {embeddings.shape}")
+        print(f"Embeddings shape: {module.embeddings.shape}")
 
         # Perform clustering
-        labels = self._cluster_embeddings(embeddings)
+        labels = self._cluster_embeddings(module.embeddings)
         print(f"Clustering produced {len(set(labels)) - (1 if -1 in labels else 0)} clusters")
 
-        # Group chunks by cluster
-        cluster_groups = self._group_by_cluster(chunks, labels)
+        # Group chunk indices by cluster
+        cluster_groups = self._group_by_cluster(labels)
 
         # Generate topic labels using LLM
-        topics_data = self._generate_topic_labels(cluster_groups, db)
+        topics_data = await self._generate_topic_labels(module, cluster_groups, db)
 
         # Store topics in database
-        stored_topics = self._store_topics(module_code, topics_data, db)
+        stored_topics = await self._store_topics(module_code, topics_data, db)
 
         return stored_topics
 
-    def _get_module_chunks(self, module_code: str, db: Session) -> List[Dict]:
+    async def _get_module_chunks(self, module_code: str, db: AsyncSession) -> ModuleChunks:
         """Get all chunks for a module with metadata"""
-        results = db.query(
-            Chunk.id,
-            Chunk.lecture_id,
-            Chunk.content,
-            Chunk.slide_number,
-            Chunk.embedding,
-            Lecture.week_number,
-            Lecture.title.label("lecture_title")
-        ).join(
-            Lecture, Chunk.lecture_id == Lecture.id
-        ).filter(
-            Lecture.module_code == module_code.upper()
-        ).filter(
-            Chunk.embedding.isnot(None)
-        ).all()
-
-        chunks = []
-        for row in results:
-            chunks.append({
-                "chunk_id": str(row.id),
-                "lecture_id": str(row.lecture_id),
-                "content": row.content,
-                "slide_number": row.slide_number,
-                "embedding": row.embedding,
-                "week_number": row.week_number,
-                "lecture_title": row.lecture_title
-            })
-
-        return chunks
+        return await load_module_chunks(module_code, db)
 
     def _cluster_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
         """Cluster embeddings using configured method"""
@@ -121,168 +116,175 @@ class TopicDetector:
         return labels
 
     def _cluster_kmeans(self, embeddings: np.ndarray) -> np.ndarray:
-        """Cluster using K-Means"""
+        """Cluster using mini-batch K-Means"""
         # Estimate number of clusters (heuristic: sqrt(n/2))
         n_clusters = max(3, min(20, int(np.sqrt(len(embeddings) / 2))))
         print(f"Using K-Means with {n_clusters} clusters")
 
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        # Unit-length rows make Euclidean K-Means equivalent to spherical
+        # (cosine) K-Means; sklearn's float32 path needs contiguous input
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1, norms)
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=1024,
+            n_init=3,
+            max_iter=100,
+            random_state=42
+        )
         labels = kmeans.fit_predict(embeddings)
         return labels
 
-    def _group_by_cluster(self, chunks: List[Dict], labels: np.ndarray) -> Dict[int, List[Dict]]:
-        """Group chunks by cluster label"""
-        cluster_groups = defaultdict(list)
+    def _group_by_cluster(self, labels: np.ndarray) -> Dict[int, np.ndarray]:
+        """Group chunk indices by cluster label"""
+        labels = np.asarray(labels)
+        unique_labels, counts = np.unique(labels, return_counts=True)
 
-        for chunk, label in zip(chunks, labels):
-            if label != -1:  # Skip noise points in HDBSCAN
-                cluster_groups[label].append(chunk)
-
-        # Filter out small clusters
-        filtered_groups = {
-            label: chunks
-            for label, chunks in cluster_groups.items()
-            if len(chunks) >= self.min_cluster_size
+        # Skip noise points in HDBSCAN and filter out small clusters
+        return {
+            int(label): np.flatnonzero(labels == label)
+            for label, count in zip(unique_labels, counts)
+            if label != -1 and count >= self.min_cluster_size
         }
 
-        return filtered_groups
-
-    def _generate_topic_labels(self, cluster_groups: Dict[int, List[Dict]], db: Session) -> List[Dict]:
-        """Generate topic labels using LLM"""
-        topics_data = []
+    async def _generate_topic_labels(
+        self,
+        module: ModuleChunks,
+        cluster_groups: Dict[int, np.ndarray],
+        db: AsyncSession
+    ) -> List[Dict]:
+        """Generate topic labels using LLM, with clusters labelled concurrently"""
+        semaphore = asyncio.Semaphore(LABEL_CONCURRENCY)
 
-        for cluster_id, chunks in cluster_groups.items():
-            print(f"Generating label for cluster {cluster_id} with {len(chunks)} chunks")
+        async def label(cluster_id: int, chunk_idx: np.ndarray) -> Dict:
+            print(f"Generating label for cluster {cluster_id} with {len(chunk_idx)} chunks")
 
             # Sample representative chunks (max 5)
-            sample_size = min(5, len(chunks))
-            sampled_chunks = np.random.choice(chunks, size=sample_size, replace=False)
+            sample_size = min(5, len(chunk_idx))
+            sampled_idx = self.rng.choice(chunk_idx, size=sample_size, replace=False)
 
             # Build prompt for LLM
             chunks_text = "\n\n".join([
-                f"Chunk {i+1}: {chunk['content'][:200]}..."
-                for i, chunk in enumerate(sampled_chunks)
+                f"Chunk {i+1}: {module.contents[chunk][:200]}..."
+                for i, chunk in enumerate(sampled_idx)
             ])
 
             prompt = f"""Analyze these text excerpts from university lecture slides and identify the main topic.
 
-{chunks_text}
-
-Provide:
-1. A concise topic name (2-5 words)
-2. A brief description (1 sentence)
-
-Format your response as:
-TOPIC: <topic name>
-DESCRIPTION: <description>"""
+{chunks_text}"""
 
             try:
-                response = llm_provider.generate(
-                    prompt=prompt,
-                    system_prompt="You are an expert at analyzing educational content and identifying key topics."
-                )
+                async with semaphore:
+                    response = await get_llm_provider().agenerate(
+                        prompt=prompt,
+                        system_prompt=TOPIC_LABEL_SYSTEM_PROMPT
+                    )
 
                 # Parse response
                 topic_name, description = self._parse_llm_response(response)
 
                 # Track appearances across lectures and weeks
-                appearances = self._track_appearances(chunks)
+                appearances = self._track_appearances(module, chunk_idx)
 
-                topics_data.append({
+                return {
                     "name": topic_name,
                     "description": description,
-                    "chunks": chunks,
                     "appearances": appearances
-                })
+                }
 
             except Exception as e:
                 print(f"Error generating label for cluster {cluster_id}: {str(e)}")
                 # Fallback: use most common words
-                topics_data.append({
+                return {
                     "name": f"Topic {cluster_id}",
                     "description": "Auto-generated topic",
-                    "chunks": chunks,
-                    "appearances": self._track_appearances(chunks)
-                })
+                    "appearances": self._track_appearances(module, chunk_idx)
+                }
 
-        return topics_data
+        # Latency follows the slowest cluster rather than the sum
+        return list(await asyncio.gather(*[
+            label(cluster_id, chunk_idx)
+            for cluster_id, chunk_idx in cluster_groups.items()
+        ]))
 
     def _parse_llm_response(self, response: str) -> Tuple[str, str]:
         """Parse LLM response to extract topic name and description"""
-        lines = response.strip().split("\n")
-        topic_name = "Untitled Topic"
-        description = ""
+        topic_match = _TOPIC_RE.search(response)
+        description_match = _DESCRIPTION_RE.search(response)
 
-        for line in lines:
-            line = line.strip()
-            if line.startswith("TOPIC:"):
-                topic_name = line.replace("TOPIC:", "").strip()
-            elif line.startswith("DESCRIPTION:"):
-                description = line.replace("DESCRIPTION:", "").strip()
+        topic_name = topic_match.group(1) if topic_match else "Untitled Topic"
+        description = description_match.group(1) if description_match else ""
 
         return topic_name, description
 
-    def _track_appearances(self, chunks: List[Dict]) -> List[Dict]:
+    def _track_appearances(self, module: ModuleChunks, chunk_idx: np.ndarray) -> List[Dict]:
         """Track topic appearances across lectures"""
-        lecture_appearances = defaultdict(lambda: {"chunks": [], "slides": set()})
-
-        for chunk in chunks:
-            lecture_id = chunk["lecture_id"]
-            lecture_appearances[lecture_id]["chunks"].append(chunk)
-            lecture_appearances[lecture_id]["slides"].add(chunk["slide_number"])
-
-        appearances = []
-        for lecture_id, data in lecture_appearances.items():
-            # Get first chunk for metadata
-            first_chunk = data["chunks"][0]
-
-            appearances.append({
-                "lecture_id": lecture_id,
-                "week_number": first_chunk["week_number"],
-                "lecture_title": first_chunk["lecture_title"],
-                "frequency": len(data["chunks"]),
-                "first_slide": min(data["slides"])
-            })
+        # Per-lecture chunk counts and first slide, grouped in NumPy
+        lectures, inverse, frequencies = np.unique(
+            module.lecture_index[chunk_idx], return_inverse=True, return_counts=True
+        )
+        first_slides = np.full(len(lectures), np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(first_slides, inverse, module.slide_numbers[chunk_idx])
 
         # Sort by week number
-        appearances.sort(key=lambda x: x["week_number"])
-
-        return appearances
+        weeks = module.lecture_weeks[lectures]
+        order = np.argsort(weeks, kind="stable")
+
+        return [
+            {
+                "lecture_id": module.lecture_ids[lectures[j]],
+                "week_number": int(weeks[j]),
+                "lecture_title": module.lecture_titles[lectures[j]],
+                "frequency": int(frequencies[j]),
+                "first_slide": int(first_slides[j])
+            }
+            for j in order
+        ]
+
+    async def _store_topics(self, module_code: str, topics_data: List[Dict], db: AsyncSession) -> List[Dict]:
+        """
+        Store topics in database
 
-    def _store_topics(self, module_code: str, topics_data: List[Dict], db: Session) -> List[Dict]:
-        """Store topics in database"""
+        IDs are generated here so topics and their appearances go in as two
+        executemany INSERTs in a single transaction, without a flush per topic.
+        """
+        topic_rows = []
+        appearance_rows = []
         stored_topics = []
 
         for topic_data in topics_data:
-            # Create topic
-            topic = Topic(
-                name=topic_data["name"],
-                description=topic_data["description"],
-                module_code=module_code.upper()
-            )
-            db.add(topic)
-            db.flush()  # Get ID without committing
+            topic_id = uuid7()
+            topic_rows.append({
+                "id": topic_id,
+                "name": topic_data["name"],
+                "description": topic_data["description"],
+                "module_code": module_code.upper()
+            })
 
-            # Create topic appearances
             for appearance in topic_data["appearances"]:
-                topic_appearance = TopicAppearance(
-                    topic_id=topic.id,
-                    lecture_id=appearance["lecture_id"],
-                    frequency=appearance["frequency"],
-                    first_slide=appearance["first_slide"]
-                )
-                db.add(topic_appearance)
-
-            db.commit()
-            db.refresh(topic)
+                appearance_rows.append({
+                    "id": uuid7(),
+                    "topic_id": topic_id,
+                    "lecture_id": appearance["lecture_id"],
+                    "frequency": appearance["frequency"],
+                    "first_slide": appearance["first_slide"]
+                })
 
             stored_topics.append({
-                "id": str(topic.id),
-                "name": topic.name,
-                "description": topic.description,
+                "id": str(topic_id),
+                "name": topic_data["name"],
+                "description": topic_data["description"],
                 "appearances": topic_data["appearances"]
             })
 
+        if topic_rows:
+            await db.execute(insert(Topic), topic_rows)
+        if appearance_rows:
+            await db.execute(insert(TopicAppearance), appearance_rows)
+        await db.commit()
+
         return stored_topics
 
     def infer_prerequisites(self, topics: List[Dict]) -> List[Dict]:
@@ -295,30 +297,33 @@ DESCRIPTION: <description>"""
         Returns:
             List of edges representing prerequisites
         """
-        edges = []
-
-        for i, topic1 in enumerate(topics):
-            first_week1 = min(app["week_number"] for app in topic1["appearances"])
-
-            for topic2 in topics[i+1:]:
-                first_week2 = min(app["week_number"] for app in topic2["appearances"])
-
-                # If topic1 appears before topic2, it might be a prerequisite
-                if first_week1 < first_week2:
-                    # Check if they co-occur in later lectures
-                    topic1_weeks = set(app["week_number"] for app in topic1["appearances"])
-                    topic2_weeks = set(app["week_number"] for app in topic2["appearances"])
-
-                    overlap = topic1_weeks & topic2_weeks
-
-                    if overlap:  # They appear together later
-                        edges.append({
-                            "source": topic1["id"],
-                            "target": topic2["id"],
-                            "type": "prerequisite"
-                        })
-
-        return edges
+        # Topics without appearances have no weeks to order by
+        topics = [topic for topic in topics if topic["appearances"]]
+        if not topics:
+            return []
+
+        # (topics x weeks) occurrence mask, built once
+        week_lists = [[app["week_number"] for app in topic["appearances"]] for topic in topics]
+        first_weeks = np.array([min(weeks) for weeks in week_lists])
+        week_mask = np.zeros((len(topics), max(max(weeks) for weeks in week_lists) + 1), dtype=bool)
+        for i, weeks in enumerate(week_lists):
+            week_mask[i, weeks] = True
+
+        # Check if they co-occur in later lectures
+        co_occurs = (week_mask.astype(np.int32) @ week_mask.T.astype(np.int32)) > 0
+
+        # If topic i appears before topic j, it might be a prerequisite
+        # (pairs are taken in list order, i < j)
+        precedes = np.triu(first_weeks[:, None] < first_weeks[None, :], k=1)
+
+        return [
+            {
+                "source": topics[i]["id"],
+                "target": topics[j]["id"],
+                "type": "prerequisite"
+            }
+            for i, j in np.argwhere(precedes & co_occurs)
+        ]
 
 
 # Singleton instance
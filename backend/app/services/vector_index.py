@@ -0,0 +1,193 @@
+"""
+Vector Index Tuning
+Scales HNSW build and search parameters with the number of stored chunks
+"""
+from typing import Dict, Optional
+import json
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy import text
+
+from ..models import KeyValue
+
+HNSW_INDEX_NAME = "idx_chunks_embedding_hnsw"
+HNSW_TIER_KEY = "hnsw_tier"
+
+# Arbitrary key shared by all workers so only one rebuilds the index
+HNSW_REBUILD_LOCK_ID = 7_311_042
+
+# Search width for this process; the migrations' tier until the recorded or
+# freshly tuned tier is loaded at startup
+_ef_search = 100
+
+
+def configure_hnsw_params(n: int) -> Dict[str, int]:
+    """
+    Pick HNSW parameters appropriate for a dataset of n vectors
+
+    The smallest tier matches the index the migrations build.
+
+    Args:
+        n: Number of vectors in the index
+
+    Returns:
+        Dictionary with m, ef_construction and ef_search
+    """
+    if n < 100_000:
+        return {"m": 24, "ef_construction": 128, "ef_search": 100}
+    elif n < 1_000_000:
+        return {"m": 32, "ef_construction": 128, "ef_search": 200}
+    else:
+        return {"m": 48, "ef_construction": 200, "ef_search": 400}
+
+
+def get_ef_search() -> int:
+    """Search width to apply per query (SET LOCAL hnsw.ef_search)"""
+    return _ef_search
+
+
+async def get_index_build_params(db) -> Optional[Dict[str, int]]:
+    """
+    Read the m / ef_construction the HNSW index is currently built with
+
+    Args:
+        db: Database session or connection
+
+    Returns:
+        Dictionary with m and ef_construction (pgvector defaults for options
+        that aren't set), or None if the index doesn't exist
+    """
+    row = (await db.execute(
+        text("SELECT reloptions FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": HNSW_INDEX_NAME}
+    )).one_or_none()
+
+    if row is None:
+        return None
+
+    params = {"m": 16, "ef_construction": 64}
+    for option in row.reloptions or []:
+        key, _, value = option.partition("=")
+        if key in params:
+            params[key] = int(value)
+
+    return params
+
+
+async def load_hnsw_tier(db: AsyncSession) -> Optional[Dict[str, int]]:
+    """
+    Restore the tier recorded in the kv table by the last tuning run
+
+    Sets this process's per-query search width from it, so a restart (or a
+    worker started with auto-tuning off) keeps the tuned value.
+
+    Returns:
+        The recorded HNSW parameters, or None if none are recorded
+    """
+    global _ef_search
+
+    state = await db.get(KeyValue, HNSW_TIER_KEY)
+    if state is None:
+        return None
+
+    try:
+        tier = json.loads(state.value)
+        _ef_search = int(tier["ef_search"])
+    except (TypeError, ValueError, KeyError):
+        # Written by an older version in another format; retuning replaces it
+        return None
+
+    return tier
+
+
+async def tune_hnsw_index(db: AsyncSession) -> Dict[str, object]:
+    """
+    Apply tier-appropriate HNSW parameters for the current chunk count
+
+    Sets this process's per-query search width, records the tier in the kv
+    table and, when the tier changed, the database-wide default
+    hnsw.ef_search. The index itself is not rebuilt here.
+
+    Args:
+        db: Database session
+
+    Returns:
+        The tier's HNSW parameters, plus rebuild=True when the index is built
+        sparser than the tier calls for (see rebuild_hnsw_index)
+    """
+    global _ef_search
+
+    recorded = await load_hnsw_tier(db)
+
+    chunk_count = (await db.execute(text("SELECT count(*) FROM chunks"))).scalar()
+    params = configure_hnsw_params(chunk_count)
+    _ef_search = params["ef_search"]
+
+    # New sessions pick up the search width as their default. Only the
+    # database owner may do this; queries set it themselves either way
+    if recorded is None or recorded.get("ef_search") != params["ef_search"]:
+        database_name = (await db.execute(text("SELECT current_database()"))).scalar()
+        try:
+            async with db.begin_nested():
+                await db.execute(text(
+                    f'ALTER DATABASE "{database_name}" SET hnsw.ef_search = {params["ef_search"]}'
+                ))
+        except Exception as e:
+            print(f"Database default hnsw.ef_search not set: {str(e)}")
+
+    if params != recorded:
+        await db.merge(KeyValue(key=HNSW_TIER_KEY, value=json.dumps(params)))
+    await db.commit()
+
+    built = await get_index_build_params(db)
+    rebuild = built is not None and (
+        params["m"] > built["m"] or params["ef_construction"] > built["ef_construction"]
+    )
+
+    return {**params, "rebuild": rebuild}
+
+
+async def rebuild_hnsw_index(engine: AsyncEngine, m: int, ef_construction: int):
+    """
+    Rebuild the HNSW index with denser build parameters
+
+    Runs REINDEX CONCURRENTLY (outside a transaction) so the index keeps
+    serving queries; an advisory lock lets only one worker do it.
+
+    Args:
+        engine: Database engine
+        m: Target graph degree
+        ef_construction: Target build candidate list size
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        locked = (await conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": HNSW_REBUILD_LOCK_ID}
+        )).scalar()
+        if not locked:
+            return
+
+        try:
+            # Another worker may have rebuilt it while we waited for startup
+            built = await get_index_build_params(conn)
+            if built is None or (built["m"] >= m and built["ef_construction"] >= ef_construction):
+                return
+
+            tier = f"m={m},ef_construction={ef_construction}"
+            print(f"Rebuilding {HNSW_INDEX_NAME} ({tier})")
+
+            await conn.execute(text(
+                f"ALTER INDEX {HNSW_INDEX_NAME} "
+                f"SET (m = {int(m)}, ef_construction = {int(ef_construction)})"
+            ))
+            await conn.execute(text(f"REINDEX INDEX CONCURRENTLY {HNSW_INDEX_NAME}"))
+
+            print(f"Rebuilt {HNSW_INDEX_NAME} ({tier})")
+
+        except Exception as e:
+            print(f"HNSW index rebuild failed: {str(e)}")
+
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": HNSW_REBUILD_LOCK_ID}
+            )
@@ -1,12 +1,25 @@
 """
 Text Chunking Strategies
 """
-from typing import List, Dict
+from typing import List, Dict, Tuple, Iterator
+import re
 from ..config import settings
+from .tokens import token_spans
+
+# Sentence boundary: terminal punctuation, whitespace, then a capital or digit,
+# except after common abbreviations found in lecture slides
+_SENTENCE_RE = re.compile(
+    r"(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\betc\.)(?<!\bvs\.)(?<!\bFig\.)(?<!\bEq\.)(?<!\bDr\.)(?<!\bcf\.)"
+    r"(?<=[.!?])\s+(?=[A-Z0-9])"
+)
 
 
 class TextChunker:
-    """Service for chunking text into appropriate sizes for embedding"""
+    """
+    Service for chunking text into appropriate sizes for embedding
+
+    Sizes are counted in the embedding model's tokens.
+    """
 
     def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
         self.chunk_size = chunk_size or settings.chunk_size
@@ -22,8 +35,18 @@ class TextChunker:
         Returns:
             List of chunks with metadata
         """
-        chunks = []
+        return list(self.iter_chunks_by_slide(slides))
+
+    def iter_chunks_by_slide(self, slides: List[Dict[str, any]]) -> Iterator[Dict[str, any]]:
+        """
+        Lazily chunk text at slide level, yielding chunks as chunk_by_slide returns them
 
+        Args:
+            slides: List of slide dicts with page_number and content
+
+        Yields:
+            Chunks with metadata
+        """
         for slide in slides:
             content = slide["content"].strip()
 
@@ -32,22 +55,21 @@ class TextChunker:
                 continue
 
             # If slide is too long, split it
-            if len(content) > self.chunk_size * 1.5:
-                sub_chunks = self._split_long_text(content)
+            spans = token_spans(content)
+            if len(spans) > self.chunk_size * 1.5:
+                sub_chunks = self._iter_token_windows(content, spans, self.chunk_size)
                 for i, sub_chunk in enumerate(sub_chunks):
-                    chunks.append({
+                    yield {
                         "slide_number": slide["page_number"],
                         "content": sub_chunk,
                         "sub_chunk_index": i
-                    })
+                    }
             else:
-                chunks.append({
+                yield {
                     "slide_number": slide["page_number"],
                     "content": content,
                     "sub_chunk_index": 0
-                })
-
-        return chunks
+                }
 
     def chunk_with_overlap(self, text: str, metadata: Dict = None) -> List[Dict[str, any]]:
         """
@@ -61,20 +83,12 @@ class TextChunker:
             List of chunks with overlap
         """
         chunks = []
-        words = text.split()
-
-        # Calculate words per chunk
-        words_per_chunk = self.chunk_size // 5  # Approximate words
-        overlap_words = self.chunk_overlap // 5
 
-        start = 0
-        chunk_index = 0
-
-        while start < len(words):
-            end = start + words_per_chunk
-            chunk_words = words[start:end]
-            chunk_text = " ".join(chunk_words)
+        # Move start position with overlap
+        step = max(1, self.chunk_size - self.chunk_overlap)
+        windows = self._iter_token_windows(text, token_spans(text), step)
 
+        for chunk_index, chunk_text in enumerate(windows):
             chunk_data = {
                 "content": chunk_text,
                 "chunk_index": chunk_index
@@ -85,31 +99,34 @@ class TextChunker:
 
             chunks.append(chunk_data)
 
-            # Move start position with overlap
-            start = end - overlap_words
-            chunk_index += 1
-
         return chunks
 
-    def _split_long_text(self, text: str) -> List[str]:
+    def _split_long_text(self, text: str, spans: List[Tuple[int, int]] = None) -> List[str]:
         """
         Split long text into chunks
 
         Args:
             text: Text to split
+            spans: Token spans of text, if already computed
 
         Returns:
             List of text chunks
         """
-        chunks = []
-        words = text.split()
-        words_per_chunk = self.chunk_size // 5
-
-        for i in range(0, len(words), words_per_chunk):
-            chunk = " ".join(words[i:i + words_per_chunk])
-            chunks.append(chunk)
-
-        return chunks
+        if spans is None:
+            spans = token_spans(text)
+        return list(self._iter_token_windows(text, spans, self.chunk_size))
+
+    def _iter_token_windows(self, text: str, spans: List[Tuple[int, int]], step: int) -> Iterator[str]:
+        """Cut chunk_size-token windows, step tokens apart, out of the original text"""
+        for start in range(0, len(spans), step):
+            end = min(start + self.chunk_size, len(spans))
+            chunk = text[spans[start][0]:spans[end - 1][1]].strip()
+            if chunk:
+                yield chunk
+
+            # The last window already reaches the end of the text
+            if end == len(spans):
+                break
 
     def chunk_by_sentences(self, text: str, max_sentences: int = 5) -> List[str]:
         """
@@ -122,14 +139,7 @@ class TextChunker:
         Returns:
             List of text chunks
         """
-        # Simple sentence splitting (could use spaCy for better results)
-        sentences = []
-        for s in text.split(". "):
-            s = s.strip()
-            if s:
-                if not s.endswith("."):
-                    s += "."
-                sentences.append(s)
+        sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
 
         chunks = []
         current_chunk = []
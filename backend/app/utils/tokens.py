@@ -0,0 +1,83 @@
+"""
+Token Counting
+Character spans of the embedding model's tokens, with a whitespace-word fallback
+"""
+from typing import List, Tuple
+from functools import lru_cache
+import os
+import re
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+from ..config import settings
+
+_WORD_RE = re.compile(r"\S+")
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Load the tokenizer of the configured embedding model
+
+    tiktoken for OpenAI models, the Hugging Face fast tokenizer otherwise.
+
+    Returns:
+        The tokenizer, or None if it can't be loaded (chunking then counts words)
+    """
+    model = settings.embedding_model
+
+    try:
+        if settings.embedding_provider == "openai":
+            if not TIKTOKEN_AVAILABLE:
+                raise ImportError("tiktoken is not installed")
+            return tiktoken.encoding_for_model(model)
+
+        # Installed with sentence-transformers / model2vec
+        from transformers import AutoTokenizer
+
+        # Bare sentence-transformers model names live under that organisation
+        repo = model if "/" in model or os.path.isdir(model) else f"sentence-transformers/{model}"
+        return AutoTokenizer.from_pretrained(repo, use_fast=True)
+
+    except Exception as e:
+        print(f"Tokenizer for {model} unavailable ({str(e)}), chunking by words")
+        return None
+
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into the embedding model's tokens
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        (start, end) character offsets of each token in text, so chunks can be
+        cut from the original string rather than decoded back from token IDs
+    """
+    tokenizer = get_tokenizer()
+
+    if tokenizer is None:
+        return [match.span() for match in _WORD_RE.finditer(text)]
+
+    if TIKTOKEN_AVAILABLE and isinstance(tokenizer, tiktoken.Encoding):
+        tokens = tokenizer.encode(text, disallowed_special=())
+        _, starts = tokenizer.decode_with_offsets(tokens)
+        return list(zip(starts, starts[1:] + [len(text)]))
+
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False
+    )
+    return [tuple(span) for span in encoding["offset_mapping"]]
+
+
+def count_tokens(text: str) -> int:
+    """Number of embedding-model tokens in text (words if no tokenizer is available)"""
+    return len(token_spans(text))
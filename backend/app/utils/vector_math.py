@@ -0,0 +1,72 @@
+"""
+Vector Math Kernels
+Numba-compiled cosine similarity with a NumPy fallback
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True, nogil=True)
+    def _cosine(a, b):
+        dot = np.float32(0.0)
+        norm_a = np.float32(0.0)
+        norm_b = np.float32(0.0)
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            norm_a += a[i] * a[i]
+            norm_b += b[i] * b[i]
+        if norm_a == 0 or norm_b == 0:
+            return np.float32(0.0)
+        return dot / np.sqrt(norm_a * norm_b)
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _cosine_rows(query, corpus, out):
+        # Fuses row norms into the dot product; no normalized copy of corpus
+        query_norm = np.sqrt(np.sum(query * query))
+        for row in prange(corpus.shape[0]):
+            dot = np.float32(0.0)
+            norm = np.float32(0.0)
+            for i in range(corpus.shape[1]):
+                dot += corpus[row, i] * query[i]
+                norm += corpus[row, i] * corpus[row, i]
+            denom = np.sqrt(norm) * query_norm
+            out[row] = dot / denom if denom > 0 else np.float32(0.0)
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity between two vectors (0.0 if either is all zeros)"""
+    a = np.ascontiguousarray(a, dtype=np.float32)
+    b = np.ascontiguousarray(b, dtype=np.float32)
+
+    # The compiled kernel doesn't bounds-check
+    if a.shape != b.shape:
+        raise ValueError(f"Vectors have different shapes: {a.shape} and {b.shape}")
+
+    if NUMBA_AVAILABLE:
+        return float(_cosine(a, b))
+
+    norms = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(np.dot(a, b) / norms) if norms else 0.0
+
+
+def cosine_rows(query: np.ndarray, corpus: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a (D,) query against each row of an (N, D) corpus"""
+    query = np.ascontiguousarray(query, dtype=np.float32)
+    corpus = np.ascontiguousarray(corpus, dtype=np.float32)
+
+    if query.ndim != 1 or corpus.ndim != 2 or corpus.shape[1] != query.shape[0]:
+        raise ValueError(f"Expected a (D,) query and (N, D) corpus, got {query.shape} and {corpus.shape}")
+
+    if NUMBA_AVAILABLE:
+        out = np.empty(corpus.shape[0], dtype=np.float32)
+        _cosine_rows(query, corpus, out)
+        return out
+
+    norms = np.linalg.norm(corpus, axis=1) * np.linalg.norm(query)
+    return np.divide(corpus @ query, norms, out=np.zeros(corpus.shape[0], dtype=np.float32), where=norms > 0)
@@ -0,0 +1,155 @@
+"""
+Shared test fixtures
+Integration tests run against the database at DATABASE_URL, migrated with `alembic upgrade head`;
+recording_db stands in for it where only the statements a route sends matter
+"""
+from typing import List, Sequence
+import uuid
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event, delete, text
+from sqlalchemy.dialects import postgresql
+
+from app.main import app
+from app.database import engine, SessionLocal, get_db
+from app.models import Lecture, Topic, TopicAppearance
+
+LECTURES_PER_MODULE = 3
+TOPICS_PER_MODULE = 3
+
+
+@pytest_asyncio.fixture
+async def database():
+    """Skip unless the test database is reachable and migrated"""
+    try:
+        async with engine.connect() as conn:
+            migrated = (await conn.execute(
+                text("SELECT to_regclass('module_summary')")
+            )).scalar() is not None
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Database unavailable: {str(e)}")
+
+    if not migrated:
+        await engine.dispose()
+        pytest.skip("Database is not migrated; run `alembic upgrade head`")
+
+    yield engine
+
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def seeded_module(database) -> str:
+    """
+    A module with several lectures and topics that appear in every lecture
+
+    Yields the module code; everything is deleted afterwards.
+    """
+    module_code = f"TEST{uuid.uuid4().hex[:8].upper()}"
+
+    async with SessionLocal() as db:
+        lectures = [
+            Lecture(
+                module_code=module_code,
+                week_number=week,
+                title=f"Lecture {week}",
+                filename=f"{module_code}_{week}.pdf",
+                num_pages=10,
+                status="ready"
+            )
+            for week in range(1, LECTURES_PER_MODULE + 1)
+        ]
+        topics = [
+            Topic(name=f"Topic {i}", description=f"Description {i}", module_code=module_code)
+            for i in range(TOPICS_PER_MODULE)
+        ]
+        db.add_all(lectures + topics)
+        await db.flush()
+
+        db.add_all([
+            TopicAppearance(topic_id=topic.id, lecture_id=lecture.id, frequency=2, first_slide=1)
+            for topic in topics
+            for lecture in lectures
+        ])
+        await db.commit()
+
+    yield module_code
+
+    async with SessionLocal() as db:
+        await db.execute(delete(Topic).where(Topic.module_code == module_code))
+        await db.execute(delete(Lecture).where(Lecture.module_code == module_code))
+        await db.commit()
+
+
+@pytest_asyncio.fixture
+async def client():
+    """HTTP client calling the app in-process"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def sql_statements(database) -> List[str]:
+    """Statements sent to the database while the test runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+class RecordedResult:
+    """Canned result supporting the accessors the routes use"""
+
+    def __init__(self, rows: Sequence):
+        self.rows = list(rows)
+
+    def scalars(self) -> "RecordedResult":
+        return self
+
+    def unique(self) -> "RecordedResult":
+        return self
+
+    def all(self) -> list:
+        return self.rows
+
+    def one(self):
+        assert len(self.rows) == 1, self.rows
+        return self.rows[0]
+
+
+class RecordingSession:
+    """
+    Database session stand-in that needs no database
+
+    Each execute() records its statement compiled for PostgreSQL and returns
+    `rows`. ORM objects in `rows` must have their relationships populated, as
+    nothing can be lazy loaded.
+    """
+
+    def __init__(self):
+        self.rows: List = []
+        self.statements: List[str] = []
+
+    async def execute(self, statement, params=None) -> RecordedResult:
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return RecordedResult(self.rows)
+
+
+@pytest.fixture
+def recording_db() -> RecordingSession:
+    """Serve the routes' database dependency from a RecordingSession"""
+    session = RecordingSession()
+
+    async def override_get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield session
+    app.dependency_overrides.pop(get_db, None)
@@ -0,0 +1,138 @@
+"""
+Query-count tests for list endpoints
+Each endpoint must issue a fixed number of statements however many rows it returns (no N+1)
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import uuid
+import pytest
+
+from app.models import Lecture, Topic, TopicAppearance
+from .conftest import LECTURES_PER_MODULE, TOPICS_PER_MODULE
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_lectures_uses_one_query(client, seeded_module, sql_statements):
+    response = await client.get("/api/lectures", params={"module_code": seeded_module})
+
+    assert response.status_code == 200
+    assert len(response.json()) == LECTURES_PER_MODULE
+    assert len(sql_statements) == 1, sql_statements
+
+
+async def test_get_topics_batch_loads_appearances(client, seeded_module, sql_statements):
+    response = await client.get(f"/api/topics/{seeded_module}")
+
+    assert response.status_code == 200
+    topics = response.json()
+    assert len(topics) == TOPICS_PER_MODULE
+    assert all(len(topic["appearances"]) == LECTURES_PER_MODULE for topic in topics)
+
+    # Topics, then appearances joined to their lectures
+    assert len(sql_statements) == 2, sql_statements
+
+
+async def test_get_dashboard_stats_uses_one_query(client, seeded_module, sql_statements):
+    response = await client.get("/api/dashboard/stats")
+
+    assert response.status_code == 200
+    assert response.json()["total_lectures"] >= LECTURES_PER_MODULE
+    assert len(sql_statements) == 1, sql_statements
+
+
+# The same endpoints against a RecordingSession, so the statements they send are
+# checked without a database. Rows come back fully loaded, so any further
+# statement would be a per-row query
+
+MODULE_CODE = "CS101"
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _lectures():
+    return [
+        Lecture(
+            id=uuid.uuid4(),
+            module_code=MODULE_CODE,
+            week_number=week,
+            title=f"Lecture {week}",
+            filename=f"{MODULE_CODE}_{week}.pdf",
+            num_pages=10,
+            status="ready",
+            upload_date=NOW
+        )
+        for week in range(1, LECTURES_PER_MODULE + 1)
+    ]
+
+
+def _topics():
+    lectures = _lectures()
+    return [
+        Topic(
+            id=uuid.uuid4(),
+            name=f"Topic {i}",
+            description=f"Description {i}",
+            module_code=MODULE_CODE,
+            created_at=NOW,
+            appearances=[
+                TopicAppearance(lecture_id=lecture.id, lecture=lecture, frequency=2, first_slide=1)
+                for lecture in lectures
+            ]
+        )
+        for i in range(TOPICS_PER_MODULE)
+    ]
+
+
+async def test_get_lectures_sql_shape(client, recording_db):
+    recording_db.rows = _lectures()
+
+    response = await client.get("/api/lectures", params={"module_code": MODULE_CODE.lower()})
+
+    assert response.status_code == 200
+    assert len(response.json()) == LECTURES_PER_MODULE
+    assert len(recording_db.statements) == 1, recording_db.statements
+
+    sql = recording_db.statements[0]
+    assert "FROM lectures" in sql
+    assert "JOIN" not in sql
+    assert "WHERE lectures.module_code = " in sql
+    assert "ORDER BY lectures.week_number" in sql
+
+
+async def test_get_topics_sql_shape(client, recording_db):
+    recording_db.rows = _topics()
+
+    response = await client.get(f"/api/topics/{MODULE_CODE}")
+
+    assert response.status_code == 200
+    topics = response.json()
+    assert len(topics) == TOPICS_PER_MODULE
+    assert all(len(topic["appearances"]) == LECTURES_PER_MODULE for topic in topics)
+
+    # Appearances are select-in loaded by the ORM, not joined onto every topic row
+    assert len(recording_db.statements) == 1, recording_db.statements
+    sql = recording_db.statements[0]
+    assert "FROM topics" in sql
+    assert "JOIN" not in sql
+    assert "WHERE topics.module_code = " in sql
+
+
+async def test_get_dashboard_stats_sql_shape(client, recording_db):
+    recording_db.rows = [SimpleNamespace(
+        total_lectures=LECTURES_PER_MODULE,
+        total_topics=TOPICS_PER_MODULE,
+        modules=[MODULE_CODE],
+        recent_uploads=[]
+    )]
+
+    response = await client.get("/api/dashboard/stats")
+
+    assert response.status_code == 200
+    assert response.json()["total_lectures"] == LECTURES_PER_MODULE
+    assert len(recording_db.statements) == 1, recording_db.statements
+
+    # Every count comes from one statement over the summary table
+    sql = recording_db.statements[0]
+    assert "FROM lectures" in sql
+    assert "FROM topics" in sql
+    assert "FROM module_summary" in sql
@@ -73,7 +73,7 @@ export default function LectureUpload() {
 
       setResult({
         success: true,
-        message: `Lecture uploaded successfully! Created ${response.chunks_created} chunks.`,
+        message: 'Lecture uploaded successfully! Processing has started and it will be searchable shortly.',
         lectureId: response.lecture.id,
         chunksCreated: response.chunks_created
       });
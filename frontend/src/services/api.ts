@@ -4,6 +4,7 @@
 import axios from 'axios';
 import type {
   Lecture,
+  LectureStatus,
   Topic,
   QueryRequest,
   QueryResponse,
@@ -54,6 +55,11 @@ export const getLecture = async (lectureId: string) => {
   return response.data;
 };
 
+export const getLectureStatus = async (lectureId: string) => {
+  const response = await apiClient.get<LectureStatus>(`/api/lectures/${lectureId}/status`);
+  return response.data;
+};
+
 export const deleteLecture = async (lectureId: string) => {
   const response = await apiClient.delete(`/api/lectures/${lectureId}`);
   return response.data;
@@ -10,6 +10,14 @@ export interface Lecture {
   filename: string;
   upload_date: string;
   num_pages?: number;
+  status: 'processing' | 'ready' | 'failed';
+}
+
+export interface LectureStatus {
+  id: string;
+  status: 'processing' | 'ready' | 'failed';
+  num_pages?: number;
+  chunks_count: number;
 }
 
 export interface Topic {